@@ -1,12 +1,32 @@
 # By Manthan Vinzuda 
 
-from flask import Flask, request, jsonify, render_template
-from PIL import Image, ImageEnhance
+from flask import Flask, Response, request, jsonify, render_template, stream_with_context
+from PIL import Image, ImageEnhance, ImageSequence
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from collections import deque, OrderedDict
 import numpy as np
+import argparse
+import itertools
+import threading
+import hashlib
+import html
+import json
+import sys
+import time
+import os
 import io
 
 app = Flask(__name__)
 
+# Largest image file accepted, and the whole request body that may carry it (form
+# fields and multipart framing included). Werkzeug answers 413 as soon as the body
+# is known to be bigger, usually from Content-Length before any of it is read.
+MAX_UPLOAD_BYTES = 5 * 1024 * 1024
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES + 64 * 1024
+
+# Decoded size limit; JPEGs are checked at their draft size, so big photos still fit
+MAX_DECODE_PIXELS = 40_000_000
+
 ASCII_RAMPS = {
     "simple":  "@%#*+=-:. ",
     "detailed":"$@B%8&WM#*oahkbdpqwmZO0QLCJUYXzcvunxrjft/\\|()1{}[]?-_+~<>i!lI;:,\"^`'. ",
@@ -14,66 +34,442 @@ ASCII_RAMPS = {
     "dots":    "●◉◎○◌ ",
 }
 
-def convert(image_bytes, width=80, ramp="simple", invert=False, contrast=1.0, color=False):
+# Two hex digits per channel value, for building color styles without formatting each one
+HEX = np.array([f"{v:02x}" for v in range(256)], dtype=object)
+
+# Image.convert("L") weights (ITU-R 601-2) in 16-bit fixed point, so gray matches Pillow exactly
+LUMA = np.array([19595, 38470, 7471], dtype=np.uint32)
+
+# Decode/shrink by whole factors down to this multiple of the output size before LANCZOS
+REDUCING_GAP = 3
+
+# Widest output accepted, in characters; this also bounds the size of the resized arrays
+MAX_WIDTH = 400
+
+# Uploads are decoded to a working copy at least this wide (when the original is),
+# enough for MAX_WIDTH-character output at the full reducing gap
+WORKING_WIDTH = MAX_WIDTH * REDUCING_GAP
+
+# Animated uploads: frames converted at most, and the delay used when a frame has none
+MAX_FRAMES = 600
+DEFAULT_FRAME_MS = 100
+
+# Memory budgets for the /convert caches
+RESULT_CACHE_BYTES = 64 * 1024 * 1024
+IMAGE_CACHE_BYTES = 128 * 1024 * 1024
+
+def working_image(image_bytes):
+    """Decodes an upload once into an RGB array of about WORKING_WIDTH pixels wide.
+
+    JPEGs are decoded straight at a reduced scale (draft), then a BOX filter
+    (plain area averaging) brings the image down to WORKING_WIDTH. This is what
+    the image cache keeps, so later requests for the same upload never decode it again.
+    """
     img = Image.open(io.BytesIO(image_bytes))
-    img_rgb  = img.convert("RGB")
-    img_gray = img.convert("L")
+    img.draft("RGB", (WORKING_WIDTH, max(1, round(WORKING_WIDTH * img.height / img.width))))
+    return shrink(img)
 
-    img_gray = ImageEnhance.Contrast(img_gray).enhance(contrast)
-    img_rgb  = ImageEnhance.Contrast(img_rgb).enhance(contrast)
+def working_frames(image_bytes, limit=MAX_FRAMES):
+    """Yields (working image, delay in ms) for each frame of an animated GIF, PNG or WebP.
 
-    h = max(1, int(width * (img.height / img.width) * 0.45))
-    img_gray = img_gray.resize((width, h), Image.LANCZOS)
-    img_rgb  = img_rgb.resize((width, h), Image.LANCZOS)
+    Frames are decoded in order because each one builds on the last; a still
+    image yields a single frame.
+    """
+    img = Image.open(io.BytesIO(image_bytes))
+    for frame in itertools.islice(ImageSequence.Iterator(img), limit):
+        yield shrink(frame), frame.info.get("duration") or DEFAULT_FRAME_MS
 
-    chars  = ASCII_RAMPS.get(ramp, ASCII_RAMPS["simple"])
-    pixels = np.array(img_gray)
-    if invert:
-        pixels = 255 - pixels
+class ImageTooLarge(ValueError):
+    pass
+
+def shrink(img):
+    """RGB array of a decoded image, BOX-filtered down to WORKING_WIDTH if it is wider."""
+    # Pillow decodes lazily, so this rejects small files that expand to huge images before decoding
+    if img.width * img.height > MAX_DECODE_PIXELS:
+        raise ImageTooLarge(f"Image is too large to convert ({img.width}x{img.height})")
+    if img.mode not in ("RGB", "RGBA", "L", "LA", "CMYK"):   # palette, 1-bit and 16-bit/float modes
+        img = img.convert("RGB")
+    if img.width > WORKING_WIDTH:
+        img = img.resize((WORKING_WIDTH, max(1, round(WORKING_WIDTH * img.height / img.width))), Image.BOX)
+    return np.asarray(img.convert("RGB"))
+
+def pixels_at(working, width, contrast=1.0):
+    """(rgb, gray) arrays at the output size from a working_image().
+
+    Only the small resized image is contrast-adjusted. Grayscale is computed
+    from the resized RGB.
+    """
+    size = (width, max(1, int(width * (working.shape[0] / working.shape[1]) * 0.45)))
+    img = Image.fromarray(working).resize(size, Image.LANCZOS, reducing_gap=REDUCING_GAP)
+    img = ImageEnhance.Contrast(img).enhance(contrast)
+
+    rgb = np.asarray(img)
+    gray = ((rgb @ LUMA + 0x8000) >> 16).astype(np.uint8)
+    return rgb, gray
 
-    idx = (pixels / 255.0 * (len(chars) - 1)).astype(int)
+def load_pixels(image_bytes, width, contrast=1.0):
+    return pixels_at(working_image(image_bytes), width, contrast)
+
+def convert(image_bytes, width=80, ramp="simple", invert=False, contrast=1.0, color=False):
+    """Returns (output, is_html, (width, height)); height is in rows of characters."""
+    return convert_working(working_image(image_bytes), width, ramp, invert, contrast, color)
+
+def convert_keeping_image(image_bytes, width=80, ramp="simple", invert=False, contrast=1.0, color=False):
+    """convert(), also returning the working image so the caller can cache it."""
+    working = working_image(image_bytes)
+    return convert_working(working, width, ramp, invert, contrast, color), working
+
+def convert_working(working, width=80, ramp="simple", invert=False, contrast=1.0, color=False):
+    rgb, gray = pixels_at(working, width, contrast)
+    chars = ASCII_RAMPS.get(ramp, ASCII_RAMPS["simple"])
+    cells = char_lut(chars, invert, escape=color)[gray]
 
     if color:
-        rgb = np.array(img_rgb)
-        rows = []
-        for r in range(h):
-            row = ""
-            for c in range(width):
-                rv, gv, bv = rgb[r, c]
-                ch = chars[idx[r, c]]
-                row += f'<span style="color:rgb({rv},{gv},{bv})">{ch}</span>'
-            rows.append(row)
-        return "\n".join(rows), True
+        return render_html(cells, rgb), True, gray.shape[::-1]
     else:
-        lines = ["".join(chars[idx[r, c]] for c in range(width)) for r in range(h)]
-        return "\n".join(lines), False
+        return "\n".join("".join(row) for row in cells.tolist()), False, gray.shape[::-1]
+
+def char_lut(chars, invert=False, escape=False):
+    """Gray level (0-255) -> character, so a whole image maps with one fancy-index."""
+    levels = (np.arange(256) / 255.0 * (len(chars) - 1)).astype(int)
+    if invert:
+        levels = levels[::-1]
+    glyphs = [html.escape(ch) for ch in chars] if escape else list(chars)
+    return np.array(glyphs, dtype=object)[levels]
+
+def render_html(cells, rgb):
+    """Colored output: one <span> per run of same-colored cells in a row.
+
+    Colors are packed into 24-bit ints so runs are found with a single array
+    compare, and style strings are built from the HEX table once per distinct
+    color. Tags and cells are scattered into one object array and joined once.
+    """
+    h, w = cells.shape
+    n = h * w
+    rgb = rgb.astype(np.int32)
+    codes = (rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2]).ravel()
+
+    starts = np.ones(n, dtype=bool)
+    starts[1:] = codes[1:] != codes[:-1]
+    starts[::w] = True   # runs never cross a row
+    run_of = np.cumsum(starts) - 1
+    starts = np.flatnonzero(starts)
+    runs = len(starts)
+    ends = np.append(starts[1:], n)
+
+    colors, color_ids = np.unique(codes[starts], return_inverse=True)
+    opens = '<span style="color:#' + HEX[colors >> 16] + HEX[colors >> 8 & 255] + HEX[colors & 255] + '">'
+    closes = np.where(ends % w == 0, "</span>\n", "</span>").astype(object)
+    closes[-1] = "</span>"
+
+    # Run j opens just before its first cell and closes just after its last one
+    pieces = np.empty(n + 2 * runs, dtype=object)
+    pieces[np.arange(n) + 2 * run_of + 1] = cells.ravel()
+    pieces[starts + 2 * np.arange(runs)] = opens[color_ids]
+    pieces[ends + 2 * np.arange(runs) + 1] = closes
+    return "".join(pieces.tolist())
+
+class ByteLRU:
+    """Thread-safe LRU that evicts by total size in bytes rather than entry count."""
+
+    def __init__(self, budget):
+        self.budget = budget
+        self.entries = OrderedDict()   # key -> (value, size)
+        self.size = 0
+        self.lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key, value, size):
+        if size > self.budget:
+            return
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.entries[key] = (value, size)
+            self.size += size
+            while self.size > self.budget:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "entries": len(self.entries), "bytes": self.size, "budget": self.budget}
+
+def image_key(image_bytes):
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+class QueueFull(Exception):
+    pass
+
+class ConversionQueue:
+    """Runs convert() on a bounded process pool and keeps serving metrics.
+
+    At most `workers + max_queue` conversions are admitted at once; beyond that
+    submit() raises QueueFull straight away instead of letting requests pile up.
+    A request that waits longer than `timeout` seconds (queued plus running)
+    gets TimeoutError. A conversion already running in a worker can't be
+    interrupted, so its slot is only freed once the worker finishes.
+    """
+
+    def __init__(self, workers=None, max_queue=None, timeout=30.0, window=60.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = self.workers * 2 if max_queue is None else max_queue
+        self.timeout = timeout
+        self.window = window
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self.lock = threading.Lock()
+        self.admitted = 0
+        self.latencies = deque(maxlen=1000)   # seconds, most recent conversions
+        self.finished = deque()               # completion times within the rate window
+        self.started = time.monotonic()
+        self.counts = {"completed": 0, "failed": 0, "rejected": 0, "timed_out": 0}
+
+    def submit(self, fn, *args):
+        return self.wait(*self.dispatch(fn, *args))
+
+    def busy(self):
+        with self.lock:
+            full = self.admitted >= self.workers + self.max_queue
+            if full: self.counts["rejected"] += 1
+        return full
+
+    def dispatch(self, fn, *args, block=False):
+        """Admits fn(*args) to the pool and returns (future, start) for wait().
+
+        Raises QueueFull when there is no free slot, or with block=True when
+        none frees up within the timeout.
+        """
+        if not self.slots.acquire(blocking=block, timeout=self.timeout if block else None):
+            with self.lock: self.counts["rejected"] += 1
+            raise QueueFull()
+        with self.lock: self.admitted += 1
+        future = self.pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future, time.monotonic()
+
+    def wait(self, future, start):
+        try:
+            result = future.result(timeout=self.timeout)
+        except TimeoutError:
+            future.cancel()   # only succeeds while it is still queued
+            with self.lock: self.counts["timed_out"] += 1
+            raise
+        except Exception:
+            with self.lock: self.counts["failed"] += 1
+            raise
+        self._record(time.monotonic() - start)
+        return result
+
+    def _release(self, future):
+        with self.lock: self.admitted -= 1
+        self.slots.release()
+
+    def _record(self, elapsed):
+        now = time.monotonic()
+        with self.lock:
+            self.counts["completed"] += 1
+            self.latencies.append(elapsed)
+            self.finished.append(now)
+            while self.finished and self.finished[0] < now - self.window:
+                self.finished.popleft()
+
+    def metrics(self):
+        now = time.monotonic()
+        with self.lock:
+            latencies = sorted(self.latencies)
+            recent = sum(1 for t in self.finished if t >= now - self.window)
+            admitted, counts = self.admitted, dict(self.counts)
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 1) if latencies else None
+        return {
+            "workers": self.workers,
+            "queue_limit": self.max_queue,
+            "in_flight": admitted,
+            "queue_depth": max(0, admitted - self.workers),
+            "latency_ms": {"p50": percentile(0.50), "p99": percentile(0.99), "samples": len(latencies)},
+            "conversions_per_sec": round(recent / min(self.window, max(now - self.started, 1e-9)), 2),
+            **counts,
+        }
+
+# Replaced from the command line in __main__; the pool starts its processes on first use
+conversions = ConversionQueue()
+
+# Finished outputs keyed by (image hash, width, ramp, invert, contrast, color), and working
+# images keyed by image hash, so changing any setting on the same upload skips the decode
+results = ByteLRU(RESULT_CACHE_BYTES)
+images = ByteLRU(IMAGE_CACHE_BYTES)
+
+def cached_convert(data, width, ramp, invert, contrast, color):
+    """Returns (result, cache headers), using the pool only for what the caches can't answer."""
+    key = image_key(data)
+    params = (width, ramp, invert, contrast, color)
+    result = results.get((key, *params))
+    result_state, image_state = "hit", "skip"
+    if result is None:
+        result_state = "miss"
+        working = images.get(key)
+        if working is None:
+            image_state = "miss"
+            result, working = conversions.submit(convert_keeping_image, data, *params)
+            images.put(key, working, working.nbytes)
+        else:
+            image_state = "hit"
+            result = conversions.submit(convert_working, working, *params)
+        results.put((key, *params), result, sys.getsizeof(result[0]))
+    headers = {"X-Result-Cache": result_state, "X-Image-Cache": image_state}
+    for name, cache in (("Result", results), ("Image", images)):
+        headers[f"X-{name}-Cache-Hits"] = str(cache.hits)
+        headers[f"X-{name}-Cache-Misses"] = str(cache.misses)
+    return result, headers
 
 @app.route("/")
 def index():
     return render_template("index.html")
 
-@app.route("/convert", methods=["POST"])
-def do_convert():
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def frame_events(data, params):
+    """Server-sent events for an animated upload, sent as each frame is converted.
+
+    "meta" carries the size, then each "frame" event holds only the rows that
+    changed since the previous frame, as [row, text] pairs, with its delay and
+    the conversion rate so far. "done" ends the stream. Up to one frame per
+    worker is in the pool at a time and frames are sent in order.
+    """
+    start = time.monotonic()
+    pending, previous, frames, delays, fps = deque(), [], 0, 0, 0.0
+    jobs = working_frames(data)
+    try:
+        while True:
+            for working, delay in itertools.islice(jobs, conversions.workers - len(pending)):
+                pending.append((conversions.dispatch(convert_working, working, *params, block=True), delay))
+            if not pending:
+                break
+            job, delay = pending.popleft()
+            text, is_html, (w, h) = conversions.wait(*job)
+            if frames == 0:
+                yield sse("meta", {"w": w, "h": h, "is_html": is_html})
+            rows = text.split("\n")
+            changed = [[i, row] for i, row in enumerate(rows) if i >= len(previous) or row != previous[i]]
+            previous, frames, delays = rows, frames + 1, delays + delay
+            fps = frames / (time.monotonic() - start)
+            yield sse("frame", {"index": frames - 1, "delay": delay, "rows": changed, "fps": round(fps, 2)})
+        yield sse("done", {"frames": frames, "fps": round(fps, 2), "playback_fps": round(1000 * frames / max(delays, 1), 2)})
+    except QueueFull:
+        yield sse("error", {"error": "Server is busy, please try again in a moment"})
+    except TimeoutError:
+        yield sse("error", {"error": f"A frame took longer than {conversions.timeout:g}s"})
+    except Exception as e:
+        yield sse("error", {"error": str(e)})
+    finally:
+        for (future, _), _ in pending:   # client went away or a frame failed
+            future.cancel()
+
+def read_limited(stream, limit, chunk_size=64 * 1024):
+    """Reads `stream` in chunks; returns None as soon as it turns out to be longer than `limit`."""
+    buf = io.BytesIO()
+    while chunk := stream.read(chunk_size):
+        if buf.tell() + len(chunk) > limit:
+            return None
+        buf.write(chunk)
+    return buf.getvalue()
+
+def read_upload():
+    """(image bytes, None) from the request, or (None, error response).
+
+    The request body is capped by MAX_CONTENT_LENGTH, and Werkzeug spools file
+    parts over 500KB to a temporary file, so the upload is never fully held
+    in memory before this reads it back.
+    """
     f = request.files.get("image")
     if not f:
-        return jsonify(error="No image"), 400
-    data = f.read()
-    if len(data) > 5 * 1024 * 1024:
-        return jsonify(error="File too large (max 5MB)"), 400
+        return None, (jsonify(error="No image"), 400)
+    data = read_limited(f.stream, MAX_UPLOAD_BYTES)
+    if data is None:
+        return None, (jsonify(error="File too large (max 5MB)"), 413)
+    return data, None
+
+def form_params():
+    """(width, ramp, invert, contrast, color) from the form; raises ValueError on bad input."""
+    width = int(request.form.get("width", 80))
+    if not 1 <= width <= MAX_WIDTH:
+        raise ValueError(f"Width must be between 1 and {MAX_WIDTH}")
+    return (width,
+            request.form.get("ramp", "simple"),
+            request.form.get("invert", "false") == "true",
+            float(request.form.get("contrast", 1.0)),
+            request.form.get("color", "false") == "true")
+
+@app.route("/convert", methods=["POST"])
+def do_convert():
+    data, error = read_upload()
+    if error:
+        return error
     try:
-        width    = int(request.form.get("width", 80))
-        ramp     = request.form.get("ramp", "simple")
-        invert   = request.form.get("invert", "false") == "true"
-        contrast = float(request.form.get("contrast", 1.0))
-        color    = request.form.get("color", "false") == "true"
-        result, is_html = convert(data, width, ramp, invert, contrast, color)
-        img = Image.open(io.BytesIO(data))
-        h = max(1, int(width * (img.height / img.width) * 0.45))
-        return jsonify(output=result, is_html=is_html, w=width, h=h)
+        params = form_params()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    try:
+        (result, is_html, (w, h)), headers = cached_convert(data, *params)
+        return jsonify(output=result, is_html=is_html, w=w, h=h), headers
+    except QueueFull:
+        return jsonify(error="Server is busy, please try again in a moment"), 503, {"Retry-After": "1"}
+    except TimeoutError:
+        return jsonify(error=f"Conversion took longer than {conversions.timeout:g}s"), 504
+    except ImageTooLarge as e:
+        return jsonify(error=str(e)), 413
     except Exception as e:
         return jsonify(error=str(e)), 500
 
+@app.route("/convert/stream", methods=["POST"])
+def do_convert_stream():
+    data, error = read_upload()
+    if error:
+        return error
+    try:
+        params = form_params()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    if conversions.busy():
+        return jsonify(error="Server is busy, please try again in a moment"), 503, {"Retry-After": "1"}
+    return Response(stream_with_context(frame_events(data, params)), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.errorhandler(413)
+def too_large(e):
+    return jsonify(error="File too large (max 5MB)"), 413
+
+@app.route("/metrics")
+def metrics():
+    return jsonify(**conversions.metrics(), result_cache=results.stats(), image_cache=images.stats())
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="ASCII Art Converter web app")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5050)
+    parser.add_argument("--workers", type=int, default=None, help="conversion processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=None, help="conversions allowed to wait for a worker (default: 2 x workers)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a request gives up with 504")
+    args = parser.parse_args()
+    conversions = ConversionQueue(args.workers, args.queue, args.timeout)
+
     print("\n  ✨ ASCII Art Converter is running!")
-    print("  👉 Open http://localhost:5050 in your browser\n")
-    app.run(host="0.0.0.0", port=5050, debug=False)
+    print(f"  ⚙️  {conversions.workers} worker(s), queue of {conversions.max_queue}, {args.timeout:g}s timeout")
+    print(f"  👉 Open http://localhost:{args.port} in your browser\n")
+    # Request threads only wait on the pool, so the threaded server is enough
+    app.run(host=args.host, port=args.port, debug=False, threaded=True)
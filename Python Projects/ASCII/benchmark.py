@@ -0,0 +1,185 @@
+# Benchmark for convert() in app.py
+# Run with: python benchmark.py [repeats]
+# Times plain and color output at widths 80/200/400 against the original
+# per-pixel loops, and checks that both give the same picture. Then measures
+# latency and peak memory of the decode/resize pipeline on 20MP JPEG and PNG,
+# and the cost of a settings change once the working image is cached.
+
+import io
+import re
+import sys
+import time
+import multiprocessing
+import numpy as np
+from PIL import Image, ImageEnhance
+from app import ASCII_RAMPS, convert, convert_working, char_lut, load_pixels, render_html, working_image
+
+WIDTHS = (80, 200, 400)
+
+def original_convert(image_bytes, width=80, ramp="simple", invert=False, contrast=1.0, color=False):
+    """convert() as it was before the vectorized rendering."""
+    img = Image.open(io.BytesIO(image_bytes))
+    img_rgb  = ImageEnhance.Contrast(img.convert("RGB")).enhance(contrast)
+    img_gray = ImageEnhance.Contrast(img.convert("L")).enhance(contrast)
+    h = max(1, int(width * (img.height / img.width) * 0.45))
+    img_gray = img_gray.resize((width, h), Image.LANCZOS)
+    img_rgb  = img_rgb.resize((width, h), Image.LANCZOS)
+
+    chars = ASCII_RAMPS.get(ramp, ASCII_RAMPS["simple"])
+    return original_render(np.array(img_gray), np.array(img_rgb), chars, invert, color), color
+
+def original_render(pixels, rgb, chars, invert=False, color=False):
+    h, width = pixels.shape
+    if invert:
+        pixels = 255 - pixels
+    idx = (pixels / 255.0 * (len(chars) - 1)).astype(int)
+
+    if color:
+        rows = []
+        for r in range(h):
+            row = ""
+            for c in range(width):
+                rv, gv, bv = rgb[r, c]
+                row += f'<span style="color:rgb({rv},{gv},{bv})">{chars[idx[r, c]]}</span>'
+            rows.append(row)
+        return "\n".join(rows)
+    lines = ["".join(chars[idx[r, c]] for c in range(width)) for r in range(h)]
+    return "\n".join(lines)
+
+SPAN = re.compile(r'<span style="color:(?:rgb\((\d+),(\d+),(\d+)\)|#(\w\w)(\w\w)(\w\w))">(.*?)</span>(\n?)', re.S)
+
+def per_cell(markup):
+    """Splits spans into one (r, g, b, char) per cell, keeping row breaks; takes rgb() or #rrggbb styles."""
+    cells = []
+    for *channels, text, nl in SPAN.findall(markup):
+        r, g, b = [int(v) for v in channels[:3]] if channels[0] else [int(v, 16) for v in channels[3:]]
+        cells += [(r, g, b, ch) for ch in text + nl]
+    return cells
+
+def sample_image(size=(1600, 1200)):
+    """A photo-like test image: smooth gradients, noise and a few flat blocks."""
+    rng = np.random.default_rng(0)
+    y, x = np.mgrid[0:size[1], 0:size[0]]
+    rgb = np.stack([x * 255 // size[0], y * 255 // size[1], (x + y) * 255 // sum(size)], axis=-1)
+    rgb = rgb + rng.integers(-12, 13, rgb.shape)
+    rgb[200:500, 300:900] = (30, 120, 200)
+    rgb[700:1000, 1000:1500] = (250, 250, 250)
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8)).save(buf, format="PNG")
+    return buf.getvalue()
+
+def large_sample(format, size=(5472, 3648)):
+    """A 20MP image in the given format: sample_image() scaled up, with fresh sensor-like noise."""
+    img = Image.open(io.BytesIO(sample_image())).resize(size, Image.BILINEAR)
+    noise = Image.merge("RGB", [Image.effect_noise(size, 40) for _ in range(3)])
+    buf = io.BytesIO()
+    Image.blend(img, noise, 0.1).save(buf, format=format, **({"quality": 90} if format == "JPEG" else {}))
+    return buf.getvalue()
+
+def timed(fn, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - start) / repeats * 1000, result
+
+def new_render(pixels, rgb, chars, invert=False, color=False):
+    """The character/markup stage of convert(), minus decoding and resizing."""
+    cells = char_lut(chars, invert, escape=color)[pixels]
+    if color:
+        return render_html(cells, rgb)
+    return "\n".join("".join(row) for row in cells.tolist())
+
+def original_pixels(data, width, contrast=1.0):
+    """Gray and RGB arrays as the original convert() produced them."""
+    img = Image.open(io.BytesIO(data))
+    size = (width, max(1, int(width * (img.height / img.width) * 0.45)))
+    gray = ImageEnhance.Contrast(img.convert("L")).enhance(contrast).resize(size, Image.LANCZOS)
+    rgb = ImageEnhance.Contrast(img.convert("RGB")).enhance(contrast).resize(size, Image.LANCZOS)
+    return np.array(rgb), np.array(gray)
+
+def peak_rss_kb():
+    """High-water RSS of this process (Linux). ru_maxrss would carry over the parent's peak after fork."""
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+
+def measure(pipeline, data, width):
+    """Runs in a fresh process: (ms, peak RSS growth in MB) for one conversion."""
+    before = peak_rss_kb()
+    fn = original_convert if pipeline == "before" else convert
+    start = time.perf_counter()
+    fn(data, width, "detailed", contrast=1.2, color=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    return elapsed, (peak_rss_kb() - before) / 1024
+
+def bench_20mp(width=200):
+    print(f"\n20MP inputs, color at width {width} (each run in a fresh process):")
+    print(f"{'input':<16} {'pipeline':<8} {'ms':>8} {'peak RSS +MB':>13} {'gray diff':>10} {'same char':>10}")
+    spawn = multiprocessing.get_context("spawn")
+    for format in ("JPEG", "PNG"):
+        data = large_sample(format)
+        old_rgb, old_gray = original_pixels(data, width, 1.2)
+        new_rgb, new_gray = load_pixels(data, width, 1.2)
+        lut = char_lut(ASCII_RAMPS["detailed"])
+        diff = np.abs(old_gray.astype(int) - new_gray).mean()
+        same = (lut[old_gray] == lut[new_gray]).mean()
+        for pipeline in ("before", "after"):
+            with spawn.Pool(1) as pool:
+                ms, rss = pool.apply(measure, (pipeline, data, width))
+            extra = f"{diff:>10.2f} {same:>10.0%}" if pipeline == "after" else ""
+            print(f"{format + f' {len(data) / 2**20:.1f}MB':<16} {pipeline:<8} {ms:>8.0f} {rss:>13.0f} {extra}")
+        # A settings change on an upload whose working image is cached skips the decode
+        working = working_image(data)
+        ms, _ = timed(lambda: convert_working(working, width, "blocks", contrast=1.5, color=True), 3)
+        print(f"{'':<16} {'cached':<8} {ms:>8.0f} {'':>13} working image {working.shape[1]}x{working.shape[0]}, "
+              f"{working.nbytes / 2**20:.1f} MB")
+
+def main(repeats=3):
+    data = sample_image()
+    chars = ASCII_RAMPS["detailed"]
+    failures = 0
+    print("Rendering only (decode, contrast and resize excluded):")
+    print(f"{'mode':<6} {'width':>5} {'before ms':>10} {'after ms':>9} {'speedup':>8} {'before KB':>10} {'after KB':>9}")
+    for color in (False, True):
+        for width in WIDTHS:
+            rgb, pixels = original_pixels(data, width)
+            before_ms, before = timed(lambda: original_render(pixels, rgb, chars, color=color), repeats)
+            after_ms, after = timed(lambda: new_render(pixels, rgb, chars, color=color), repeats)
+            print(f"{'color' if color else 'plain':<6} {width:>5} {before_ms:>10.2f} {after_ms:>9.2f} "
+                  f"{before_ms / after_ms:>7.1f}x {len(before) / 1024:>10.0f} {len(after) / 1024:>9.0f}")
+
+    print(f"\nEnd to end convert() on a {Image.open(io.BytesIO(data)).size} PNG:")
+    print(f"{'mode':<6} {'width':>5} {'before ms':>10} {'after ms':>9} {'speedup':>8}")
+    for color in (False, True):
+        for width in WIDTHS:
+            before_ms, _ = timed(lambda: original_convert(data, width, "detailed", color=color), repeats)
+            after_ms, _ = timed(lambda: convert(data, width, "detailed", color=color), repeats)
+            print(f"{'color' if color else 'plain':<6} {width:>5} {before_ms:>10.1f} {after_ms:>9.1f} {before_ms / after_ms:>7.1f}x")
+
+    # Same picture from the same pixels: plain text is identical, colored spans expand back to
+    # the per-cell markup. "simple" has no characters that need HTML escaping.
+    for width in WIDTHS:
+        rgb, pixels = original_pixels(data, width, 1.4)
+        for invert in (False, True):
+            for color in (False, True):
+                before = original_render(pixels, rgb, ASCII_RAMPS["simple"], invert, color)
+                after = new_render(pixels, rgb, ASCII_RAMPS["simple"], invert, color)
+                same = per_cell(before) == per_cell(after) if color else before == after
+                failures += not same
+                if not same:
+                    print(f"BAD width={width} invert={invert} color={color} differs from the original")
+    print(f"\n{'OK ' if not failures else 'BAD'} rendering matches the original loops "
+          f"({len(WIDTHS) * 4} width/invert/mode combinations)")
+
+    # convert() must report the size it rendered
+    for width in WIDTHS:
+        text, _, (w, h) = convert(data, width)
+        rows = text.split("\n")
+        if (len(rows), len(rows[0])) != (h, w):
+            failures += 1
+            print(f"BAD width={width}: convert() reported {w}x{h}, rendered {len(rows[0])}x{len(rows)}")
+
+    bench_20mp()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
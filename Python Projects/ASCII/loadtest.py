@@ -0,0 +1,90 @@
+# Load test for the ASCII converter's serving mode
+# Start the app first, e.g.:  python app.py --workers 2 --queue 4
+# then run:                   python loadtest.py --concurrency 16 --requests 200
+# Fires concurrent uploads at /convert, then prints the client-side view
+# (status codes, latency, throughput) next to the server's /metrics.
+
+import io
+import sys
+import json
+import time
+import uuid
+import argparse
+import urllib.request
+import urllib.error
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+def multipart(fields, filename, payload):
+    """Encodes form fields plus one 'image' file as multipart/form-data."""
+    boundary = uuid.uuid4().hex
+    body = io.BytesIO()
+    for name, value in fields.items():
+        body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    body.write(f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="{filename}"\r\n'
+               f'Content-Type: application/octet-stream\r\n\r\n'.encode())
+    body.write(payload)
+    body.write(f"\r\n--{boundary}--\r\n".encode())
+    return body.getvalue(), f"multipart/form-data; boundary={boundary}"
+
+def post(url, body, content_type, timeout):
+    req = urllib.request.Request(url, data=body, headers={"Content-Type": content_type}, method="POST")
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as res:
+            res.read()
+            status = res.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except OSError:
+        status = "error"
+    return status, time.perf_counter() - start
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(p * len(values)))] * 1000 if values else float("nan")
+
+def sample_upload():
+    """A 1600x1200 PNG from benchmark.py, so no image file is needed."""
+    from benchmark import sample_image
+    return "sample.png", sample_image()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://127.0.0.1:5050")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--image", help="image file to upload (default: generated 1600x1200 PNG)")
+    parser.add_argument("--width", type=int, default=120)
+    parser.add_argument("--color", action="store_true")
+    parser.add_argument("--timeout", type=float, default=60.0, help="client-side timeout per request")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, "rb") as f:
+            filename, payload = args.image, f.read()
+    else:
+        filename, payload = sample_upload()
+    fields = {"width": args.width, "ramp": "detailed", "invert": "false", "contrast": "1.0",
+              "color": "true" if args.color else "false"}
+    body, content_type = multipart(fields, filename, payload)
+
+    print(f"{args.requests} uploads of {len(payload) / 1024:.0f} KB, {args.concurrency} at a time -> {args.url}/convert")
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(lambda _: post(args.url + "/convert", body, content_type, args.timeout),
+                                range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    statuses = Counter(status for status, _ in results)
+    ok = [latency for status, latency in results if status == 200]
+    print(f"\nStatus codes: " + ", ".join(f"{code} x{n}" for code, n in sorted(statuses.items(), key=str)))
+    print(f"Client latency of 200s: p50 {percentile(ok, 0.50):.0f} ms, p99 {percentile(ok, 0.99):.0f} ms")
+    print(f"Throughput: {len(ok) / elapsed:.2f} conversions/sec over {elapsed:.1f}s")
+
+    with urllib.request.urlopen(args.url + "/metrics", timeout=10) as res:
+        print("\nServer /metrics:\n" + json.dumps(json.load(res), indent=2))
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
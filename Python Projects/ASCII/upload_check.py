@@ -0,0 +1,131 @@
+# Upload limit check for the ASCII converter
+# Run with: python upload_check.py
+# Starts app.py on a spare port, posts oversized bodies (200MB with and without
+# Content-Length), a decompression bomb, an oversized output width and a 20MP JPEG,
+# and checks the status codes and that the server's peak RSS (its own plus pool
+# workers') stays bounded.
+# Linux only: memory is read from /proc.
+
+import io
+import os
+import sys
+import time
+import signal
+import itertools
+import socket
+import subprocess
+import urllib.request
+from PIL import Image
+from benchmark import large_sample
+
+PORT = 5077
+BODY_MB = 200
+PEAK_LIMIT_MB = 64   # allowed growth of peak RSS over the warmed-up server
+
+def peak_rss_mb(pid):
+    """VmHWM of a process and of its children (the conversion pool), in MB."""
+    total = 0
+    pids = [pid]
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids += [int(child) for child in f.read().split()]
+    for p in pids:
+        with open(f"/proc/{p}/status") as f:
+            total += next(int(line.split()[1]) for line in f if line.startswith("VmHWM:"))
+    return total / 1024
+
+def post(body_parts, content_length=None, read_timeout=60):
+    """Sends a multipart POST to /convert from an iterable of chunks; returns (status, MB sent).
+
+    The server may answer and hang up before the body is finished, so the send
+    stops quietly on a closed connection and the response is read anyway.
+    """
+    boundary = "asciicheck"
+    sock = socket.create_connection(("127.0.0.1", PORT))
+    sock.settimeout(read_timeout)
+    framing = f"Content-Length: {content_length}" if content_length is not None else "Transfer-Encoding: chunked"
+    sock.sendall((f"POST /convert HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+                  f"Content-Type: multipart/form-data; boundary={boundary}\r\n{framing}\r\n\r\n").encode())
+    sent = 0
+    try:
+        for part in body_parts:
+            if content_length is None:
+                part = b"%x\r\n%s\r\n" % (len(part), part)
+            sock.sendall(part)
+            sent += len(part)
+        if content_length is None:
+            sock.sendall(b"0\r\n\r\n")
+    except (BrokenPipeError, ConnectionResetError):
+        pass
+    try:
+        status = int(sock.recv(64).split()[1])
+    except (ConnectionResetError, IndexError):
+        status = "closed"
+    sock.close()
+    return status, sent / 2**20
+
+def multipart(payload_chunks, payload_size, boundary="asciicheck", width=200):
+    """(iterable of body chunks, body length) for a form with a width field and one image file."""
+    head = (f'--{boundary}\r\nContent-Disposition: form-data; name="width"\r\n\r\n{width}\r\n'
+            f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="upload"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return itertools.chain([head], payload_chunks, [tail]), len(head) + payload_size + len(tail)
+
+def zeros(total, chunk=1024 * 1024):
+    block = bytes(chunk)
+    for _ in range(total // chunk):
+        yield block
+
+def file_body(data, width=200):
+    return multipart([data], len(data), width=width)
+
+def bomb():
+    """A few KB of PNG that decodes to a 12000x12000 image (432MB as RGB)."""
+    buf = io.BytesIO()
+    Image.new("1", (12000, 12000)).save(buf, format="PNG")
+    return buf.getvalue()
+
+def main():
+    here = os.path.dirname(os.path.abspath(__file__))
+    # Own process group, so the pool worker is stopped along with the server
+    server = subprocess.Popen([sys.executable, "app.py", "--workers", "1", "--port", str(PORT)],
+                              cwd=here, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    failures = 0
+    try:
+        for _ in range(50):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{PORT}/metrics", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.2)
+        post(*file_body(large_sample("JPEG", (800, 600))))   # warm up: starts the pool worker and its imports
+        photo = large_sample("JPEG", (5472, 3648))
+        base = peak_rss_mb(server.pid)
+        print(f"Warmed-up server peak RSS: {base:.0f} MB (server + pool worker)\n")
+
+        body = BODY_MB * 2**20
+        checks = [
+            (f"{BODY_MB}MB body with Content-Length", lambda: post(*multipart(zeros(body), body)), {413}),
+            (f"{BODY_MB}MB chunked body", lambda: post(multipart(zeros(body), body)[0]), {413}),
+            ("decompression bomb PNG", lambda: post(*file_body(bomb())), {413}),
+            ("20MP JPEG at width 20000", lambda: post(*file_body(photo, width=20000)), {400}),
+            (f"20MP JPEG ({len(photo) / 2**20:.1f}MB)", lambda: post(*file_body(photo)), {200}),
+        ]
+        for label, run, expected in checks:
+            start = time.perf_counter()
+            status, sent = run()
+            elapsed = time.perf_counter() - start
+            growth = peak_rss_mb(server.pid) - base
+            ok = status in expected and growth < PEAK_LIMIT_MB
+            failures += not ok
+            print(f"{'OK ' if ok else 'BAD'} {label:<34} -> {status} after {sent:6.1f} MB sent, {elapsed:5.2f}s, "
+                  f"peak RSS +{growth:.0f} MB")
+    finally:
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+    print(f"\n{'OK ' if not failures else 'BAD'} peak RSS stayed within +{PEAK_LIMIT_MB} MB")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,13 @@
 """************************************"""
 """    Code By Vinzuda Manthan S.      """
 """************************************"""
+import os
+import time
 from database import db
+from ingest import BulkIngestor
+from ledger import ledger
+from session import sessions
+from datetime import datetime
 from utils import Utils, Fore, Style
 from tabulate import tabulate
 
@@ -32,6 +38,8 @@ class AdminPortal:
             print("4. Delete Account (Admin)")
             print("5. Bank Statistics")
             print("6. All Transactions")
+            print("7. Bulk Ingest File")
+            print("8. Run Monthly Interest (All Savings)")
             print("0. Logout")
             
             choice = input("\nChoice: ")
@@ -41,12 +49,13 @@ class AdminPortal:
             elif choice == '4': self.admin_delete()
             elif choice == '5': self.stats()
             elif choice == '6': self.all_txs()
+            elif choice == '7': self.bulk_ingest()
+            elif choice == '8': self.interest_run()
             elif choice == '0': break
 
     def view_all(self):
-        conn = db.get_connection()
-        users = conn.execute("SELECT account_number, full_name, balance, is_active, is_frozen FROM users").fetchall()
-        conn.close()
+        with db.connection() as conn:
+            users = conn.execute("SELECT account_number, full_name, balance, is_active, is_frozen FROM users").fetchall()
         headers = ["Acc Num", "Name", "Balance", "Active", "Frozen"]
         rows = [[u[0], u[1], Utils.format_currency(u[2]), bool(u[3]), bool(u[4])] for u in users]
         print(tabulate(rows, headers=headers, tablefmt="grid"))
@@ -54,9 +63,8 @@ class AdminPortal:
 
     def search(self):
         query = input("Enter Account Number or Email to search: ")
-        conn = db.get_connection()
-        user = conn.execute("SELECT * FROM users WHERE account_number = ? OR email = ?", (query, query)).fetchone()
-        conn.close()
+        with db.connection() as conn:
+            user = conn.execute("SELECT * FROM users WHERE account_number = ? OR email = ?", (query, query)).fetchone()
         if user:
             print(tabulate([dict(user).items()], tablefmt="fancy_grid"))
         else:
@@ -65,43 +73,75 @@ class AdminPortal:
 
     def toggle_freeze(self):
         acc = input("Enter Account Number: ")
-        conn = db.get_connection()
-        user = conn.execute("SELECT is_frozen FROM users WHERE account_number = ?", (acc,)).fetchone()
-        if user:
-            new_status = 0 if user['is_frozen'] else 1
-            conn.execute("UPDATE users SET is_frozen = ? WHERE account_number = ?", (new_status, acc))
-            conn.commit()
-            print(Fore.GREEN + f"Status updated to {'Frozen' if new_status else 'Unfrozen'}.")
-        else:
-            print(Fore.RED + "Account not found.")
-        conn.close()
+        with db.connection() as conn:
+            user = conn.execute("SELECT is_frozen FROM users WHERE account_number = ?", (acc,)).fetchone()
+            if user:
+                new_status = 0 if user['is_frozen'] else 1
+                conn.execute("UPDATE users SET is_frozen = ? WHERE account_number = ?", (new_status, acc))
+                conn.commit()
+                sessions.invalidate(acc)
+                print(Fore.GREEN + f"Status updated to {'Frozen' if new_status else 'Unfrozen'}.")
+            else:
+                print(Fore.RED + "Account not found.")
         input("\nPress Enter...")
 
     def admin_delete(self):
         acc = input("Enter Account Number to SOFT DELETE: ")
-        conn = db.get_connection()
-        conn.execute("UPDATE users SET is_active = 0 WHERE account_number = ?", (acc,))
-        conn.commit()
-        conn.close()
+        with db.connection() as conn:
+            conn.execute("UPDATE users SET is_active = 0 WHERE account_number = ?", (acc,))
+        sessions.invalidate(acc)
         print(Fore.GREEN + "Account deactivated.")
         input("\nPress Enter...")
 
     def stats(self):
-        conn = db.get_connection()
-        total_bal = conn.execute("SELECT SUM(balance) FROM users WHERE is_active = 1").fetchone()[0] or 0
-        total_users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
-        total_txs = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
-        conn.close()
-        
-        print(Fore.CYAN + f"Total Bank Liquidity: {Utils.format_currency(total_bal)}")
-        print(f"Total Registered Users: {total_users}")
-        print(f"Total Transactions Logged: {total_txs}")
+        stats = db.bank_stats()
+        print(Fore.CYAN + f"Total Bank Liquidity: {Utils.format_currency(stats['total_liquidity'])}")
+        print(f"Total Registered Users: {stats['total_users']} "
+              f"(Active: {stats['active_users']}, Frozen: {stats['frozen_users']})")
+        print(f"Total Transactions Logged: {stats['transaction_count']}")
+
+        if stats['by_type']:
+            rows = [[t, count, Utils.format_currency(amount)] for t, (count, amount) in stats['by_type'].items()]
+            print("\n" + tabulate(rows, headers=["Type", "Count", "Volume"], tablefmt="simple"))
+
+        days = db.daily_volumes(14)
+        if days:
+            print(Style.BRIGHT + "\nDaily Volume (last 14 days)")
+            peak = max(amount for _, _, amount in days) or 1
+            for day, count, amount in days:
+                bar = "#" * max(1, round(30 * amount / peak))
+                print(f"{day}  {Fore.GREEN}{bar:<30}{Style.RESET_ALL} {Utils.format_currency(amount)} ({count} txs)")
         input("\nPress Enter...")
 
     def all_txs(self):
-        conn = db.get_connection()
-        txs = conn.execute("SELECT * FROM transactions ORDER BY timestamp DESC LIMIT 20").fetchall()
-        conn.close()
+        with db.connection() as conn:
+            txs = conn.execute("SELECT * FROM transactions ORDER BY timestamp DESC LIMIT 20").fetchall()
         print(tabulate(txs, headers="keys", tablefmt="simple"))
         input("\nPress Enter...")
 
+    def bulk_ingest(self):
+        path = input("Path to CSV/JSONL file: ").strip().strip('"')
+        if not os.path.exists(path):
+            print(Fore.RED + "File not found.")
+        else:
+            Utils.loader("Ingesting transactions")
+            report = BulkIngestor().ingest_file(path)
+            sessions.clear()
+            print(Fore.GREEN + report.summary())
+            for line_no, _, reason in report.rejected[:10]:
+                print(Fore.RED + f"Line {line_no}: {reason}")
+            if len(report.rejected) > 10:
+                print(Fore.YELLOW + f"...and {len(report.rejected) - 10} more (use ingest.py --rejects to save them).")
+        input("\nPress Enter...")
+
+    def interest_run(self):
+        month = datetime.now().strftime("%Y-%m")
+        confirm = input(f"Credit 4% interest to all Savings accounts for {month}? (y/n): ")
+        if confirm.lower() == 'y':
+            def progress(chunk_no, credited, seconds):
+                print(f"  Chunk {chunk_no}: {credited} accounts credited in {seconds * 1000:.1f} ms")
+            credited, total = ledger.run_monthly_interest(month, progress=progress)
+            sessions.clear()
+            print(Fore.GREEN + f"{credited} accounts credited, {Utils.format_currency(total)} total interest.")
+        input("\nPress Enter...")
+
@@ -0,0 +1,90 @@
+
+"""************************************"""
+"""    Code By Vinzuda Manthan S.      """
+"""************************************"""
+
+import hashlib
+import secrets
+import threading
+from database import db
+
+# 11-digit body + 1 Luhn check digit = 12-digit account number.
+HIGH_SIZE = 10 ** 5
+LOW_SIZE = 10 ** 6
+FEISTEL_ROUNDS = 6      # must stay even so the halves end at their original sizes
+
+def luhn_digit(body):
+    """Check digit that makes body + digit pass the Luhn test."""
+    total = 0
+    for i, ch in enumerate(reversed(body)):
+        d = int(ch)
+        if i % 2 == 0:
+            d *= 2
+            if d > 9:
+                d -= 9
+        total += d
+    return str((10 - total % 10) % 10)
+
+def luhn_valid(number):
+    return number.isdigit() and luhn_digit(number[:-1]) == number[-1]
+
+class AccountNumberAllocator:
+    """Hands out unique account numbers without probing the users table.
+
+    A counter is scrambled by a keyed Feistel network (a bijection on
+    0..10^11-1) so consecutive accounts do not get guessable numbers, then
+    a Luhn digit is appended. Counters are reserved from the `sequences`
+    table in blocks, so only one write happens per `block_size`
+    registrations; numbers from a block lost in a crash are simply skipped.
+    """
+
+    def __init__(self, database=db, name="account_number", block_size=100):
+        self.db = database
+        self.name = name
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = self._limit = 0
+        self._key = None
+
+    def _reserve(self, count):
+        with self.db.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO sequences (name, next_value, secret) VALUES (?, 0, ?)",
+                         (self.name, secrets.token_hex(16)))
+            row = conn.execute("UPDATE sequences SET next_value = next_value + ? WHERE name = ? RETURNING next_value, secret",
+                               (count, self.name)).fetchall()[0]
+        self._key = bytes.fromhex(row['secret'])
+        return row['next_value'] - count, row['next_value']
+
+    def _round(self, r, value):
+        digest = hashlib.blake2b(f"{r}:{value}".encode(), key=self._key, digest_size=8).digest()
+        return int.from_bytes(digest, "big")
+
+    def _permute(self, n):
+        high, low = divmod(n, LOW_SIZE)
+        for r in range(FEISTEL_ROUNDS):
+            # The halves swap every round, so the new low half alternates between the two sizes
+            high, low = low, (high + self._round(r, low)) % (LOW_SIZE if r % 2 else HIGH_SIZE)
+        return high * LOW_SIZE + low
+
+    def _format(self, counter):
+        if counter >= HIGH_SIZE * LOW_SIZE:
+            raise OverflowError("Account number space exhausted")
+        body = f"{self._permute(counter):011d}"
+        return body + luhn_digit(body)
+
+    def next(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._next, self._limit = self._reserve(self.block_size)
+            counter = self._next
+            self._next += 1
+        return self._format(counter)
+
+    def allocate(self, count):
+        """Reserves `count` numbers in one write, for bulk account creation."""
+        with self._lock:
+            start, end = self._reserve(count)
+        return [self._format(c) for c in range(start, end)]
+
+# Shared instance
+allocator = AccountNumberAllocator()
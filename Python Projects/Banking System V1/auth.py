@@ -3,10 +3,10 @@
 """    Code By Vinzuda Manthan S.      """
 """************************************"""
 
-import bcrypt
-import random
-import string
+import time
 from database import db
+from passwords import hasher
+from allocator import allocator
 from utils import Utils, Fore
 
 class Auth:
@@ -14,14 +14,8 @@ class Auth:
 
     @staticmethod
     def generate_account_number():
-        """Generates a unique 12-digit account number."""
-        while True:
-            acc_num = "".join([str(random.randint(0, 9)) for _ in range(12)])
-            conn = db.get_connection()
-            user = conn.execute("SELECT id FROM users WHERE account_number = ?", (acc_num,)).fetchone()
-            conn.close()
-            if not user:
-                return acc_num
+        """Returns a unique 12-digit, Luhn-checked account number (no database probe)."""
+        return allocator.next()
 
     @staticmethod
     def register():
@@ -48,26 +42,27 @@ class Auth:
             print(Fore.RED + "Invalid amount.")
             return
 
-        hashed_pw = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        # Hash on the worker pool while the account number is generated
+        pending_hash = hasher.hash_async(password)
         acc_num = Auth.generate_account_number()
+        hashed_pw = pending_hash.result()
         ifsc = "GMNB0001234"
 
         try:
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO users (full_name, dob, phone, email, address, password_hash, 
-                                  account_number, ifsc_code, account_type, balance)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (name, dob, phone, email, address, hashed_pw, acc_num, ifsc, acc_type, deposit))
+            with db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    INSERT INTO users (full_name, dob, phone, email, address, password_hash, 
+                                      account_number, ifsc_code, account_type, balance)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (name, dob, phone, email, address, hashed_pw, acc_num, ifsc, acc_type, deposit))
+                
+                # First transaction
+                cursor.execute('''
+                    INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
+                    VALUES (?, 'Initial Deposit', ?, ?)
+                ''', (acc_num, deposit, deposit))
             
-            # First transaction
-            cursor.execute('''
-                INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
-                VALUES (?, 'Initial Deposit', ?, ?)
-            ''', (acc_num, deposit, deposit))
-            
-            conn.commit()
             Utils.loader("Creating your account")
             print(Fore.GREEN + f"\nSuccess! Account Created.")
             print(Fore.CYAN + f"Account Number: {acc_num}")
@@ -75,8 +70,6 @@ class Auth:
             input("\nPress Enter to continue...")
         except Exception as e:
             print(Fore.RED + f"Error: {e}")
-        finally:
-            conn.close()
 
     @staticmethod
     def login():
@@ -84,8 +77,8 @@ class Auth:
         acc_num = Utils.get_input("Account Number")
         password = input(Fore.WHITE + "Password: ").strip()
 
-        conn = db.get_connection()
-        user = conn.execute("SELECT * FROM users WHERE account_number = ?", (acc_num,)).fetchone()
+        with db.connection() as conn:
+            user = conn.execute("SELECT * FROM users WHERE account_number = ?", (acc_num,)).fetchone()
 
         if not user:
             print(Fore.RED + "Account not found.")
@@ -107,18 +100,22 @@ class Auth:
             time.sleep(1.5)
             return None
 
-        if bcrypt.checkpw(password.encode('utf-8'), user['password_hash'].encode('utf-8')):
-            # Reset failed attempts
-            conn.execute("UPDATE users SET failed_attempts = 0 WHERE account_number = ?", (acc_num,))
-            conn.commit()
-            conn.close()
+        if hasher.verify(password, user['password_hash']):
+            user = dict(user)
+            # Upgrade the hash if the work factor changed. It is computed before the
+            # write, so the reset and the new hash are one short UPDATE and no other
+            # writer waits on bcrypt.
+            if hasher.needs_rehash(user['password_hash']):
+                user['password_hash'] = hasher.hash_async(password).result()
+            with db.connection() as conn:
+                conn.execute("UPDATE users SET failed_attempts = 0, password_hash = ? WHERE account_number = ?",
+                             (user['password_hash'], acc_num))
             Utils.loader("Authenticating")
-            return dict(user)
+            return user
         else:
             attempts = user['failed_attempts'] + 1
-            conn.execute("UPDATE users SET failed_attempts = ? WHERE account_number = ?", (attempts, acc_num))
-            conn.commit()
-            conn.close()
+            with db.connection() as conn:
+                conn.execute("UPDATE users SET failed_attempts = ? WHERE account_number = ?", (attempts, acc_num))
             print(Fore.RED + f"Invalid Password. Attempts left: {3 - attempts}")
             time.sleep(1.5)
             return None
@@ -3,23 +3,68 @@
 """************************************"""
 
 from database import db
+from ledger import ledger, LedgerError, InsufficientFunds
+from session import sessions
 from utils import Utils, Fore, Style
 from tabulate import tabulate
 from datetime import datetime
-import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from passwords import hasher
+import time
+
+# Background worker that fetches the next history page while the current one is on screen
+_prefetcher = ThreadPoolExecutor(max_workers=1, thread_name_prefix="history-prefetch")
+
+class HistoryPager:
+    """Keyset pager over an account's transactions with next-page prefetch."""
+
+    def __init__(self, account_number, page_size=5, database=db):
+        self.account_number = account_number
+        self.page_size = page_size
+        self.database = database
+        self.page_no = 0
+        self.rows = []
+        self._next = None
+        self._load(self.database.history_page(account_number, page_size))
+
+    def _load(self, rows):
+        self.rows = rows
+        self._next = None
+        if rows:
+            self._next = _prefetcher.submit(self.database.history_page, self.account_number,
+                                            self.page_size, after_id=rows[-1]['id'])
+
+    def has_next(self):
+        return self._next is not None and bool(self._next.result())
+
+    def has_previous(self):
+        return self.page_no > 0
+
+    def next(self):
+        if self.has_next():
+            self.page_no += 1
+            self._load(self._next.result())
+
+    def previous(self):
+        if self.has_previous() and self.rows:
+            self.page_no -= 1
+            self._load(self.database.history_page(self.account_number, self.page_size,
+                                                  before_id=self.rows[0]['id']))
 
 class Banking:
     """Handles core banking features for logged-in users."""
 
     def __init__(self, user):
-        self.user = user
+        self.account_number = user['account_number']
+        sessions.put(user)
+
+    @property
+    def user(self):
+        """Cached session record (no password hash); reloaded only after invalidation."""
+        return sessions.get(self.account_number)
 
     def refresh_user(self):
-        conn = db.get_connection()
-        updated = conn.execute("SELECT * FROM users WHERE account_number = ?", 
-                              (self.user['account_number'],)).fetchone()
-        conn.close()
-        self.user = dict(updated)
+        sessions.load(self.account_number)
 
     def view_details(self):
         Utils.display_header("ACCOUNT DETAILS")
@@ -39,117 +84,65 @@ class Banking:
         Utils.display_header("DEPOSIT MONEY")
         try:
             amount = float(Utils.get_input("Enter amount to deposit", lambda x: float(x) > 0))
-            conn = db.get_connection()
-            cursor = conn.cursor()
-            
-            new_balance = self.user['balance'] + amount
-            cursor.execute("UPDATE users SET balance = ? WHERE account_number = ?", 
-                           (new_balance, self.user['account_number']))
-            
-            cursor.execute('''
-                INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
-                VALUES (?, 'Deposit', ?, ?)
-            ''', (self.user['account_number'], amount, new_balance))
-            
-            conn.commit()
-            conn.close()
-            self.refresh_user()
+            sessions.set_balance(self.account_number, ledger.deposit(self.account_number, amount))
             print(Fore.GREEN + f"Successfully deposited {Utils.format_currency(amount)}.")
             print(f"New Balance: {Utils.format_currency(self.user['balance'])}")
         except ValueError:
             print(Fore.RED + "Invalid input.")
+        except LedgerError as e:
+            print(Fore.RED + f"Error: {e}")
         input("\nPress Enter to continue...")
 
     def withdraw(self):
         Utils.display_header("WITHDRAW MONEY")
         try:
             amount = float(Utils.get_input("Enter amount to withdraw", lambda x: float(x) > 0))
-            if amount > self.user['balance']:
-                print(Fore.RED + "Insufficient balance.")
-            elif self.user['balance'] - amount < 500:
-                print(Fore.RED + "Error: Must maintain minimum ₹500 balance.")
-            else:
-                conn = db.get_connection()
-                cursor = conn.cursor()
-                new_balance = self.user['balance'] - amount
-                cursor.execute("UPDATE users SET balance = ? WHERE account_number = ?", 
-                               (new_balance, self.user['account_number']))
-                cursor.execute('''
-                    INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
-                    VALUES (?, 'Withdrawal', ?, ?)
-                ''', (self.user['account_number'], amount, new_balance))
-                conn.commit()
-                conn.close()
-                self.refresh_user()
-                print(Fore.GREEN + f"Success! Withdrew {Utils.format_currency(amount)}.")
+            sessions.set_balance(self.account_number, ledger.withdraw(self.account_number, amount))
+            print(Fore.GREEN + f"Success! Withdrew {Utils.format_currency(amount)}.")
         except ValueError:
             print(Fore.RED + "Invalid input.")
+        except LedgerError as e:
+            print(Fore.RED + f"Error: {e}")
         input("\nPress Enter to continue...")
 
     def transfer(self):
         Utils.display_header("TRANSFER MONEY")
         target_acc = Utils.get_input("Enter Receiver Account Number")
-        if target_acc == self.user['account_number']:
+        if target_acc == self.account_number:
             print(Fore.RED + "Cannot transfer to yourself.")
             input("\nPress Enter...")
             return
 
-        conn = db.get_connection()
-        receiver = conn.execute("SELECT * FROM users WHERE account_number = ? AND is_active = 1", 
-                                (target_acc,)).fetchone()
+        with db.connection() as conn:
+            receiver = conn.execute("SELECT 1 FROM users WHERE account_number = ? AND is_active = 1", 
+                                    (target_acc,)).fetchone()
         
         if not receiver:
             print(Fore.RED + "Receiver account not found or inactive.")
-            conn.close()
             input("\nPress Enter...")
             return
 
         try:
             amount = float(Utils.get_input("Enter transfer amount", lambda x: float(x) > 0))
-            if self.user['balance'] - amount < 500:
-                print(Fore.RED + "Transfer failed. Insufficient funds (Min ₹500 rule).")
-            else:
-                cursor = conn.cursor()
-                # Deduct from sender
-                new_sender_bal = self.user['balance'] - amount
-                cursor.execute("UPDATE users SET balance = ? WHERE account_number = ?", 
-                               (new_sender_bal, self.user['account_number']))
-                cursor.execute('''
-                    INSERT INTO transactions (account_number, transaction_type, amount, balance_after, related_account)
-                    VALUES (?, 'Transfer Sent', ?, ?, ?)
-                ''', (self.user['account_number'], amount, new_sender_bal, target_acc))
-
-                # Add to receiver
-                new_rec_bal = receiver['balance'] + amount
-                cursor.execute("UPDATE users SET balance = ? WHERE account_number = ?", 
-                               (new_rec_bal, target_acc))
-                cursor.execute('''
-                    INSERT INTO transactions (account_number, transaction_type, amount, balance_after, related_account)
-                    VALUES (?, 'Transfer Received', ?, ?, ?)
-                ''', (target_acc, amount, new_rec_bal, self.user['account_number']))
-
-                conn.commit()
-                self.refresh_user()
-                print(Fore.GREEN + f"Successfully transferred {Utils.format_currency(amount)} to {target_acc}.")
+            sender_bal, receiver_bal = ledger.transfer(self.account_number, target_acc, amount)
+            sessions.set_balance(self.account_number, sender_bal)
+            sessions.set_balance(target_acc, receiver_bal)
+            print(Fore.GREEN + f"Successfully transferred {Utils.format_currency(amount)} to {target_acc}.")
         except ValueError:
             print(Fore.RED + "Invalid amount.")
-        finally:
-            conn.close()
+        except InsufficientFunds:
+            print(Fore.RED + "Transfer failed. Insufficient funds (Min ₹500 rule).")
+        except LedgerError as e:
+            print(Fore.RED + f"Transfer failed. {e}")
         input("\nPress Enter to continue...")
 
-    def transaction_history(self):
-        page = 0
+    def transaction_history(self, page_size=5):
+        pager = HistoryPager(self.account_number, page_size)
         while True:
             Utils.display_header("TRANSACTION HISTORY")
-            conn = db.get_connection()
-            txs = conn.execute('''
-                SELECT id, timestamp, transaction_type, amount, balance_after 
-                FROM transactions WHERE account_number = ? 
-                ORDER BY timestamp DESC LIMIT 5 OFFSET ?
-            ''', (self.user['account_number'], page * 5)).fetchall()
-            conn.close()
-
-            if not txs and page == 0:
+            txs = pager.rows
+
+            if not txs and not pager.has_previous():
                 print("No transactions yet.")
                 break
             
@@ -158,10 +151,10 @@ class Banking:
                      Utils.format_currency(t['amount']), Utils.format_currency(t['balance_after'])] for t in txs]
             
             print(tabulate(rows, headers=headers, tablefmt="simple"))
-            print(f"\nPage {page + 1} | [N] Next | [P] Previous | [B] Back")
+            print(f"\nPage {pager.page_no + 1} | [N] Next | [P] Previous | [B] Back")
             choice = input("Choice: ").lower()
-            if choice == 'n' and len(txs) == 5: page += 1
-            elif choice == 'p' and page > 0: page -= 1
+            if choice == 'n': pager.next()
+            elif choice == 'p': pager.previous()
             elif choice == 'b': break
 
     def apply_interest(self):
@@ -171,45 +164,29 @@ class Banking:
             input("\nPress Enter...")
             return
 
-        current_month = datetime.now().strftime("%Y-%m")
-        conn = db.get_connection()
-        already_paid = conn.execute('''
-            SELECT id FROM transactions 
-            WHERE account_number = ? AND transaction_type = 'Interest Credit' 
-            AND timestamp LIKE ?
-        ''', (self.user['account_number'], f"{current_month}%")).fetchone()
-
-        if already_paid:
-            print(Fore.YELLOW + "Interest already applied for this month.")
-        else:
-            interest = self.user['balance'] * 0.04
-            new_bal = self.user['balance'] + interest
-            cursor = conn.cursor()
-            cursor.execute("UPDATE users SET balance = ? WHERE account_number = ?", 
-                           (new_bal, self.user['account_number']))
-            cursor.execute('''
-                INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
-                VALUES (?, 'Interest Credit', ?, ?)
-            ''', (self.user['account_number'], interest, new_bal))
-            conn.commit()
-            self.refresh_user()
-            print(Fore.GREEN + f"Interest of {Utils.format_currency(interest)} (4%) credited.")
+        try:
+            credited = ledger.credit_interest(self.account_number, 0.04, datetime.now().strftime("%Y-%m"))
+            if credited is None:
+                print(Fore.YELLOW + "Interest already applied for this month.")
+            else:
+                interest, balance = credited
+                sessions.set_balance(self.account_number, balance)
+                print(Fore.GREEN + f"Interest of {Utils.format_currency(interest)} (4%) credited.")
+        except LedgerError as e:
+            print(Fore.RED + f"Error: {e}")
         
-        conn.close()
         input("\nPress Enter...")
 
     def change_password(self):
         Utils.display_header("CHANGE PASSWORD")
         old_pw = input("Current Password: ")
-        if bcrypt.checkpw(old_pw.encode('utf-8'), self.user['password_hash'].encode('utf-8')):
+        if hasher.verify(old_pw, sessions.password_hash(self.account_number)):
             new_pw = Utils.get_input("New Password", Utils.validate_password, "Password too weak")
-            hashed_pw = bcrypt.hashpw(new_pw.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            hashed_pw = hasher.hash(new_pw)
             
-            conn = db.get_connection()
-            conn.execute("UPDATE users SET password_hash = ? WHERE account_number = ?", 
-                         (hashed_pw, self.user['account_number']))
-            conn.commit()
-            conn.close()
+            with db.connection() as conn:
+                conn.execute("UPDATE users SET password_hash = ? WHERE account_number = ?", 
+                             (hashed_pw, self.account_number))
             print(Fore.GREEN + "Password updated successfully.")
         else:
             print(Fore.RED + "Incorrect current password.")
@@ -226,11 +203,10 @@ class Banking:
         confirm = input("Type 'DELETE' to confirm: ")
         if confirm == 'DELETE':
             pw = input("Enter password to confirm: ")
-            if bcrypt.checkpw(pw.encode('utf-8'), self.user['password_hash'].encode('utf-8')):
-                conn = db.get_connection()
-                conn.execute("UPDATE users SET is_active = 0 WHERE account_number = ?", (self.user['account_number'],))
-                conn.commit()
-                conn.close()
+            if hasher.verify(pw, sessions.password_hash(self.account_number)):
+                with db.connection() as conn:
+                    conn.execute("UPDATE users SET is_active = 0 WHERE account_number = ?", (self.account_number,))
+                sessions.invalidate(self.account_number)
                 print(Fore.GREEN + "Account deactivated successfully.")
                 time.sleep(2)
                 return True
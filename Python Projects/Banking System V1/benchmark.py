@@ -0,0 +1,292 @@
+
+"""************************************"""
+"""    Code By Vinzuda Manthan S.      """
+"""************************************"""
+
+# Run with: python benchmark.py
+# Every benchmark runs against a throwaway database in a temp folder.
+
+import os
+import sys
+import time
+import random
+import tempfile
+import threading
+from database import Database
+from ledger import Ledger, LedgerError
+from ingest import BulkIngestor
+from passwords import PasswordHasher
+from allocator import AccountNumberAllocator
+
+def seed(database, accounts=200):
+    with database.connection() as conn:
+        conn.executemany('''
+            INSERT INTO users (full_name, dob, phone, email, address, password_hash,
+                               account_number, ifsc_code, account_type, balance)
+            VALUES (?, '01/01/2000', '9999999999', ?, 'Bench Street', 'x', ?, 'GMNB0001234', 'Savings', 10000)
+        ''', [(f"User {i}", f"user{i}@bench.local", f"{i:012d}") for i in range(accounts)])
+
+def report(label, ops, elapsed):
+    print(f"{label:<40} {ops / elapsed:>12,.0f} ops/sec")
+
+def bench_connections(database, ops=2000):
+    """One deposit + refresh_user round, done the old way and the pooled way."""
+    print("\n== Connection handling ==")
+
+    start = time.perf_counter()
+    for i in range(ops):
+        acc = f"{i % 200:012d}"
+        conn = database.get_connection()
+        conn.execute("UPDATE users SET balance = balance + 1 WHERE account_number = ?", (acc,))
+        conn.execute("INSERT INTO transactions (account_number, transaction_type, amount, balance_after) VALUES (?, 'Deposit', 1, 0)", (acc,))
+        conn.commit()
+        conn.close()
+        conn = database.get_connection()
+        conn.execute("SELECT * FROM users WHERE account_number = ?", (acc,)).fetchone()
+        conn.close()
+    report("connect-per-call", ops, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(ops):
+        acc = f"{i % 200:012d}"
+        with database.connection() as conn:
+            conn.execute("UPDATE users SET balance = balance + 1 WHERE account_number = ?", (acc,))
+            conn.execute("INSERT INTO transactions (account_number, transaction_type, amount, balance_after) VALUES (?, 'Deposit', 1, 0)", (acc,))
+        with database.connection() as conn:
+            conn.execute("SELECT * FROM users WHERE account_number = ?", (acc,)).fetchone()
+    report("pooled (WAL, synchronous=NORMAL)", ops, time.perf_counter() - start)
+
+# Hot queries from banking.py / admin.py that must be served by an index.
+HOT_QUERIES = [
+    ("history first page", '''
+        SELECT id, timestamp, transaction_type, amount, balance_after
+        FROM transactions WHERE account_number = ?
+        ORDER BY timestamp DESC, id DESC LIMIT 5
+    ''', ("000000000001",)),
+    ("history older page", '''
+        SELECT id, timestamp, transaction_type, amount, balance_after
+        FROM transactions WHERE account_number = ?
+        AND (timestamp, id) < (SELECT timestamp, id FROM transactions WHERE id = ?)
+        ORDER BY timestamp DESC, id DESC LIMIT 5
+    ''', ("000000000001", 1)),
+    ("history newer page", '''
+        SELECT id, timestamp, transaction_type, amount, balance_after
+        FROM transactions WHERE account_number = ?
+        AND (timestamp, id) > (SELECT timestamp, id FROM transactions WHERE id = ?)
+        ORDER BY timestamp, id LIMIT 5
+    ''', ("000000000001", 1)),
+    ("interest already paid", "SELECT 1 FROM interest_runs WHERE account_number = ? AND month = ?",
+     ("000000000001", "2026-01")),
+    ("admin all transactions", "SELECT * FROM transactions ORDER BY timestamp DESC LIMIT 20", ()),
+    ("user lookup", "SELECT * FROM users WHERE account_number = ?", ("000000000001",)),
+]
+
+def check_query_plans(database):
+    """Fails if any hot query falls back to a full scan or a temp sort."""
+    print(f"\n== Query plans (schema v{database.schema_version()}) ==")
+    failures = 0
+    for label, sql, params in HOT_QUERIES:
+        plan = database.explain(sql, params)
+        uses_index = any("USING" in step and "INDEX" in step for step in plan)
+        temp_sort = any("TEMP B-TREE" in step for step in plan)
+        ok = uses_index and not temp_sort
+        failures += not ok
+        print(f"{'OK ' if ok else 'BAD'} {label:<28} {' | '.join(plan)}")
+    return failures
+
+def bench_pagination(database, rows=20000, page_size=5):
+    """Walks an account's full history: OFFSET paging vs keyset cursors."""
+    print("\n== History pagination ==")
+    acc = "000000000007"
+    with database.connection() as conn:
+        conn.executemany(
+            "INSERT INTO transactions (account_number, transaction_type, amount, balance_after, timestamp) "
+            "VALUES (?, 'Deposit', 1, 0, datetime('2024-01-01', ?))",
+            [(acc, f"+{i} seconds") for i in range(rows)])
+    pages = rows // page_size
+
+    start = time.perf_counter()
+    with database.connection() as conn:
+        for page in range(pages):
+            conn.execute('''
+                SELECT id, timestamp, transaction_type, amount, balance_after
+                FROM transactions WHERE account_number = ?
+                ORDER BY timestamp DESC, id DESC LIMIT ? OFFSET ?
+            ''', (acc, page_size, page * page_size)).fetchall()
+    report(f"OFFSET paging ({pages} pages)", pages, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    page = database.history_page(acc, page_size)
+    walked = 1
+    while page:
+        page = database.history_page(acc, page_size, after_id=page[-1]['id'])
+        walked += 1
+    report(f"keyset paging ({walked} pages)", walked, time.perf_counter() - start)
+
+def stress_transfers(database, threads=8, transfers=500, accounts=20):
+    """Hammers concurrent transfers; money supply must be conserved exactly."""
+    print("\n== Concurrent transfer stress ==")
+    ledger = Ledger(database)
+    pool = [f"{i:012d}" for i in range(accounts)]
+
+    def total():
+        with database.connection() as conn:
+            return conn.execute("SELECT SUM(balance) FROM users").fetchone()[0]
+
+    before = total()
+    done, rejected = [0], [0]
+    lock = threading.Lock()
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        for _ in range(transfers):
+            src, dst = rng.sample(pool, 2)
+            try:
+                ledger.transfer(src, dst, rng.randint(1, 3000))
+                ok = True
+            except LedgerError:
+                ok = False
+            with lock:
+                done[0] += ok
+                rejected[0] += not ok
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+    for t in workers: t.start()
+    for t in workers: t.join()
+    elapsed = time.perf_counter() - start
+
+    after = total()
+    with database.connection() as conn:
+        below_min = conn.execute("SELECT COUNT(*) FROM users WHERE balance < 500").fetchone()[0]
+    report(f"transfers ({threads} threads)", done[0] + rejected[0], elapsed)
+    print(f"committed={done[0]} rejected={rejected[0]} below_min={below_min}")
+    conserved = abs(after - before) < 1e-6 and below_min == 0
+    print(f"{'OK ' if conserved else 'BAD'} money supply {before:,.2f} -> {after:,.2f}")
+    return 0 if conserved else 1
+
+def bench_ingest(database, workdir, rows=100000, accounts=200):
+    """Streams a synthetic end-of-day CSV through BulkIngestor."""
+    print("\n== Bulk ingestion ==")
+    path = os.path.join(workdir, "eod.csv")
+    rng = random.Random(42)
+    with open(path, "w") as f:
+        f.write("account_number,type,amount\n")
+        for _ in range(rows):
+            kind = "deposit" if rng.random() < 0.6 else "withdrawal"
+            f.write(f"{rng.randrange(accounts + 5):012d},{kind},{rng.randint(1, 2000)}\n")
+
+    result = BulkIngestor(database, chunk_size=5000).ingest_file(path)
+    print(f"{'ingest, 5000-row chunks':<40} {result.rows_per_sec:>12,.0f} rows/sec")
+    print(f"accepted={result.accepted:,} rejected={len(result.rejected):,} chunks={result.chunks}")
+    with database.connection() as conn:
+        drifted = conn.execute("""
+            SELECT COUNT(*) FROM users u JOIN transactions t ON t.id = (
+                SELECT MAX(id) FROM transactions WHERE account_number = u.account_number)
+            WHERE u.balance != t.balance_after
+        """).fetchone()[0]
+    print(f"{'OK ' if not drifted else 'BAD'} every balance equals its last balance_after ({drifted} drifted)")
+
+def bench_interest_run(database, chunk_size=50):
+    """Month-end batch over every Savings account, then a no-op re-run."""
+    print("\n== Monthly interest batch ==")
+    ledger = Ledger(database)
+    for attempt in ("first run", "re-run"):
+        timings = []
+        start = time.perf_counter()
+        credited, total = ledger.run_monthly_interest(
+            "2026-01", chunk_size=chunk_size, progress=lambda n, c, sec: timings.append(sec))
+        elapsed = time.perf_counter() - start
+        slowest = max(timings) * 1000 if timings else 0
+        print(f"{attempt:<10} credited={credited} total={total:,.2f} chunks={len(timings)} "
+              f"slowest_chunk={slowest:.1f}ms elapsed={elapsed * 1000:.1f}ms")
+
+def bench_allocator(database, count=20000):
+    """Random draw + uniqueness probe per number vs the block allocator."""
+    print("\n== Account number allocation ==")
+    start = time.perf_counter()
+    for _ in range(count // 10):
+        while True:
+            acc_num = "".join(str(random.randint(0, 9)) for _ in range(12))
+            with database.connection() as conn:
+                if not conn.execute("SELECT id FROM users WHERE account_number = ?", (acc_num,)).fetchone():
+                    break
+    report("random + SELECT probe", count // 10, time.perf_counter() - start)
+
+    allocator = AccountNumberAllocator(database)
+    start = time.perf_counter()
+    numbers = [allocator.next() for _ in range(count)]
+    report("allocator.next() (block of 100)", count, time.perf_counter() - start)
+    start = time.perf_counter()
+    numbers += allocator.allocate(count)
+    report("allocator.allocate(bulk)", count, time.perf_counter() - start)
+    print(f"{'OK ' if len(set(numbers)) == len(numbers) else 'BAD'} {len(numbers):,} numbers, all unique")
+
+def check_stats(database, reads=2000):
+    """Trigger-maintained totals must match a full scan, and read far faster."""
+    print("\n== Bank statistics ==")
+    scan_sql = '''
+        SELECT (SELECT COALESCE(SUM(balance), 0) FROM users WHERE is_active = 1),
+               (SELECT COUNT(*) FROM users),
+               (SELECT COUNT(*) FROM transactions)
+    '''
+    start = time.perf_counter()
+    for _ in range(reads // 20):
+        with database.connection() as conn:
+            liquidity, users, txs = conn.execute(scan_sql).fetchone()
+    report("full-scan stats", reads // 20, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(reads):
+        stats = database.bank_stats()
+    report("bank_stats summary row", reads, time.perf_counter() - start)
+
+    with database.connection() as conn:
+        by_type = {row[0]: (row[1], row[2]) for row in conn.execute(
+            "SELECT transaction_type, COUNT(*), SUM(amount) FROM transactions GROUP BY transaction_type")}
+        daily = conn.execute("SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM transactions").fetchone()
+        rolled = conn.execute("SELECT SUM(tx_count), COALESCE(SUM(amount), 0) FROM daily_stats").fetchone()
+    ok = (abs(stats['total_liquidity'] - liquidity) < 1e-3
+          and (stats['total_users'], stats['transaction_count']) == (users, txs)
+          and stats['by_type'].keys() == by_type.keys()
+          and all(stats['by_type'][t][0] == n and abs(stats['by_type'][t][1] - a) < 1e-3
+                  for t, (n, a) in by_type.items())
+          and rolled[0] == daily[0] and abs(rolled[1] - daily[1]) < 1e-3)
+    print(f"{'OK ' if ok else 'BAD'} summary matches scan: liquidity={liquidity:,.2f} users={users} txs={txs}")
+    return 0 if ok else 1
+
+def bench_logins(rounds=10, logins=32, pool_sizes=(1, 2, 4, 8)):
+    """bcrypt verifications per second on the hashing pool at several sizes."""
+    print(f"\n== Login hashing (bcrypt cost {rounds}) ==")
+    stored = PasswordHasher(rounds=rounds, workers=1)
+    hashed = stored.hash("Secret@123")
+    stored.shutdown()
+    for workers in pool_sizes:
+        hasher = PasswordHasher(rounds=rounds, workers=workers)
+        hasher.verify("warm-up", hashed)   # start the worker processes
+        start = time.perf_counter()
+        futures = [hasher.verify_async("Secret@123", hashed) for _ in range(logins)]
+        assert all(f.result() for f in futures)
+        report(f"logins, pool of {workers}", logins, time.perf_counter() - start)
+        hasher.shutdown()
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="bank_bench_")
+    database = Database(os.path.join(workdir, "bench.db"))
+    seed(database)
+
+    failures = check_query_plans(database)
+    bench_connections(database)
+    bench_pagination(database)
+    failures += stress_transfers(database)
+    bench_ingest(database, workdir)
+    bench_interest_run(database)
+    bench_allocator(database)
+    failures += check_stats(database)
+    bench_logins()
+
+    database.pool.close_all()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,63 +4,377 @@
 """************************************"""
 
 import sqlite3
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 
+# Pragmas applied once to every pooled connection.
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Ordered schema migrations: (version, description, statements).
+# Never edit an applied entry; append a new version instead.
+MIGRATIONS = [
+    (1, "Base users and transactions tables", [
+        '''
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            full_name TEXT NOT NULL,
+            dob TEXT NOT NULL,
+            phone TEXT NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            address TEXT NOT NULL,
+            password_hash TEXT NOT NULL,
+            account_number TEXT UNIQUE NOT NULL,
+            ifsc_code TEXT NOT NULL,
+            account_type TEXT NOT NULL,
+            balance REAL NOT NULL DEFAULT 0.0,
+            is_active INTEGER DEFAULT 1,
+            is_frozen INTEGER DEFAULT 0,
+            failed_attempts INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            account_number TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            amount REAL NOT NULL,
+            balance_after REAL NOT NULL,
+            related_account TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (account_number) REFERENCES users (account_number)
+        )
+        ''',
+    ]),
+    (2, "Indexes for history, interest and admin transaction queries", [
+        "CREATE INDEX IF NOT EXISTS idx_tx_account_time ON transactions (account_number, timestamp DESC)",
+        "CREATE INDEX IF NOT EXISTS idx_tx_account_type_time ON transactions (account_number, transaction_type, timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_tx_time ON transactions (timestamp)",
+        "ANALYZE",
+    ]),
+    (3, "Ascending history index so keyset pages walk (timestamp, id) both ways", [
+        "CREATE INDEX IF NOT EXISTS idx_tx_account_ts ON transactions (account_number, timestamp)",
+        "DROP INDEX IF EXISTS idx_tx_account_time",
+    ]),
+    (4, "Interest idempotency table keyed by (account, month)", [
+        '''
+        CREATE TABLE IF NOT EXISTS interest_runs (
+            account_number TEXT NOT NULL,
+            month TEXT NOT NULL,
+            amount REAL NOT NULL,
+            credited_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (account_number, month)
+        )
+        ''',
+        '''
+        INSERT OR IGNORE INTO interest_runs (account_number, month, amount, credited_at)
+        SELECT account_number, strftime('%Y-%m', timestamp), amount, timestamp
+        FROM transactions WHERE transaction_type = 'Interest Credit'
+        ''',
+    ]),
+    (5, "Sequence high-water marks for the account number allocator", [
+        '''
+        CREATE TABLE IF NOT EXISTS sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL,
+            secret TEXT NOT NULL
+        )
+        ''',
+    ]),
+    (6, "Trigger-maintained bank statistics and daily volume rollup", [
+        '''
+        CREATE TABLE IF NOT EXISTS bank_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_liquidity REAL NOT NULL DEFAULT 0,
+            total_users INTEGER NOT NULL DEFAULT 0,
+            active_users INTEGER NOT NULL DEFAULT 0,
+            frozen_users INTEGER NOT NULL DEFAULT 0,
+            transaction_count INTEGER NOT NULL DEFAULT 0
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS transaction_type_stats (
+            transaction_type TEXT PRIMARY KEY,
+            tx_count INTEGER NOT NULL,
+            amount REAL NOT NULL
+        )
+        ''',
+        '''
+        CREATE TABLE IF NOT EXISTS daily_stats (
+            day TEXT NOT NULL,
+            transaction_type TEXT NOT NULL,
+            tx_count INTEGER NOT NULL,
+            amount REAL NOT NULL,
+            PRIMARY KEY (day, transaction_type)
+        )
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_stats_insert AFTER INSERT ON users BEGIN
+            UPDATE bank_stats SET
+                total_liquidity = total_liquidity + NEW.balance * (NEW.is_active IS 1),
+                total_users = total_users + 1,
+                active_users = active_users + (NEW.is_active IS 1),
+                frozen_users = frozen_users + (NEW.is_frozen IS 1)
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_stats_update AFTER UPDATE OF balance, is_active, is_frozen ON users BEGIN
+            UPDATE bank_stats SET
+                total_liquidity = total_liquidity + NEW.balance * (NEW.is_active IS 1) - OLD.balance * (OLD.is_active IS 1),
+                active_users = active_users + (NEW.is_active IS 1) - (OLD.is_active IS 1),
+                frozen_users = frozen_users + (NEW.is_frozen IS 1) - (OLD.is_frozen IS 1)
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_users_stats_delete AFTER DELETE ON users BEGIN
+            UPDATE bank_stats SET
+                total_liquidity = total_liquidity - OLD.balance * (OLD.is_active IS 1),
+                total_users = total_users - 1,
+                active_users = active_users - (OLD.is_active IS 1),
+                frozen_users = frozen_users - (OLD.is_frozen IS 1)
+            WHERE id = 1;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tx_stats_insert AFTER INSERT ON transactions BEGIN
+            UPDATE bank_stats SET transaction_count = transaction_count + 1 WHERE id = 1;
+            INSERT INTO transaction_type_stats (transaction_type, tx_count, amount)
+            VALUES (NEW.transaction_type, 1, NEW.amount)
+            ON CONFLICT (transaction_type) DO UPDATE SET
+                tx_count = tx_count + 1, amount = amount + excluded.amount;
+            INSERT INTO daily_stats (day, transaction_type, tx_count, amount)
+            VALUES (date(NEW.timestamp), NEW.transaction_type, 1, NEW.amount)
+            ON CONFLICT (day, transaction_type) DO UPDATE SET
+                tx_count = tx_count + 1, amount = amount + excluded.amount;
+        END
+        ''',
+        '''
+        CREATE TRIGGER IF NOT EXISTS trg_tx_stats_delete AFTER DELETE ON transactions BEGIN
+            UPDATE bank_stats SET transaction_count = transaction_count - 1 WHERE id = 1;
+            UPDATE transaction_type_stats SET tx_count = tx_count - 1, amount = amount - OLD.amount
+            WHERE transaction_type = OLD.transaction_type;
+            UPDATE daily_stats SET tx_count = tx_count - 1, amount = amount - OLD.amount
+            WHERE day = date(OLD.timestamp) AND transaction_type = OLD.transaction_type;
+        END
+        ''',
+        # Backfill from the rows that existed before the triggers did
+        '''
+        INSERT OR REPLACE INTO bank_stats (id, total_liquidity, total_users, active_users, frozen_users, transaction_count)
+        SELECT 1,
+               (SELECT COALESCE(SUM(balance), 0) FROM users WHERE is_active = 1),
+               (SELECT COUNT(*) FROM users),
+               (SELECT COUNT(*) FROM users WHERE is_active = 1),
+               (SELECT COUNT(*) FROM users WHERE is_frozen = 1),
+               (SELECT COUNT(*) FROM transactions)
+        ''',
+        '''
+        INSERT OR REPLACE INTO transaction_type_stats (transaction_type, tx_count, amount)
+        SELECT transaction_type, COUNT(*), SUM(amount) FROM transactions GROUP BY transaction_type
+        ''',
+        '''
+        INSERT OR REPLACE INTO daily_stats (day, transaction_type, tx_count, amount)
+        SELECT date(timestamp), transaction_type, COUNT(*), SUM(amount) FROM transactions
+        GROUP BY date(timestamp), transaction_type
+        ''',
+    ]),
+]
+
+HISTORY_COLUMNS = "id, timestamp, transaction_type, amount, balance_after"
+
+class ConnectionPool:
+    """Keeps a bounded set of warm SQLite connections and hands them out per thread."""
+
+    def __init__(self, db_name, max_size=5, timeout=10.0):
+        self.db_name = db_name
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._local = threading.local()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        with self._lock:
+            self._all.append(conn)
+        return conn
+
+    def _acquire(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise sqlite3.OperationalError("Connection pool exhausted")
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            try:
+                return self._open()
+            except Exception:
+                self._slots.release()
+                raise
+
+    def _release(self, conn):
+        self._idle.put(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Checks out a connection for the current thread.
+
+        Nested checkouts on the same thread share one connection, so a helper
+        called from inside another operation joins its transaction. The
+        outermost block commits on success and rolls back on error.
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            try:
+                yield held
+            finally:
+                self._local.depth -= 1
+            return
+
+        conn = self._acquire()
+        self._local.conn, self._local.depth = conn, 1
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._local.conn, self._local.depth = None, 0
+            self._release(conn)
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        self._idle = queue.LifoQueue()
+
 class Database:
     """Handles all database interactions for the banking system."""
-    
-    def __init__(self, db_name="bank.db"):
+
+    def __init__(self, db_name="bank.db", pool_size=5):
         self.db_name = db_name
+        self.pool = ConnectionPool(db_name, max_size=pool_size)
         self.init_db()
 
     def get_connection(self):
-        """Returns a connection to the SQLite database."""
+        """Returns a fresh, unpooled connection (kept for one-off scripts)."""
         conn = sqlite3.connect(self.db_name)
         conn.row_factory = sqlite3.Row
         return conn
 
+    def connection(self):
+        """Context manager yielding a pooled connection: `with db.connection() as conn:`."""
+        return self.pool.connection()
+
+    @contextmanager
+    def transaction(self):
+        """Pooled connection inside BEGIN IMMEDIATE; joins an enclosing transaction if one is open."""
+        with self.connection() as conn:
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
     def init_db(self):
-        """Initializes tables if they do not exist."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-
-        # Users Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                full_name TEXT NOT NULL,
-                dob TEXT NOT NULL,
-                phone TEXT NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                address TEXT NOT NULL,
-                password_hash TEXT NOT NULL,
-                account_number TEXT UNIQUE NOT NULL,
-                ifsc_code TEXT NOT NULL,
-                account_type TEXT NOT NULL,
-                balance REAL NOT NULL DEFAULT 0.0,
-                is_active INTEGER DEFAULT 1,
-                is_frozen INTEGER DEFAULT 0,
-                failed_attempts INTEGER DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-
-        # Transactions Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS transactions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                account_number TEXT NOT NULL,
-                transaction_type TEXT NOT NULL,
-                amount REAL NOT NULL,
-                balance_after REAL NOT NULL,
-                related_account TEXT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (account_number) REFERENCES users (account_number)
-            )
-        ''')
-
-        conn.commit()
-        conn.close()
+        """Brings the schema up to the latest version."""
+        with self.connection() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    description TEXT NOT NULL,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.commit()
+            current = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+            for version, description, statements in MIGRATIONS:
+                if version <= current:
+                    continue
+                conn.execute("BEGIN IMMEDIATE")
+                # Another process may have migrated while we waited for the lock.
+                if conn.execute("SELECT 1 FROM schema_version WHERE version = ?", (version,)).fetchone():
+                    conn.commit()
+                    continue
+                for sql in statements:
+                    conn.execute(sql)
+                conn.execute("INSERT INTO schema_version (version, description) VALUES (?, ?)",
+                             (version, description))
+                conn.commit()
+
+    def schema_version(self):
+        with self.connection() as conn:
+            return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+
+    def history_page(self, account_number, page_size=5, after_id=None, before_id=None):
+        """Keyset page of an account's history, newest first.
+
+        `after_id` returns the page older than that transaction, `before_id`
+        the page newer than it. Cost depends only on page_size, not depth.
+        """
+        sql = f"SELECT {HISTORY_COLUMNS} FROM transactions WHERE account_number = ?"
+        params = [account_number]
+        if before_id is not None:
+            sql += " AND (timestamp, id) > (SELECT timestamp, id FROM transactions WHERE id = ?) ORDER BY timestamp, id"
+            params.append(before_id)
+        elif after_id is not None:
+            sql += " AND (timestamp, id) < (SELECT timestamp, id FROM transactions WHERE id = ?) ORDER BY timestamp DESC, id DESC"
+            params.append(after_id)
+        else:
+            sql += " ORDER BY timestamp DESC, id DESC"
+        sql += " LIMIT ?"
+        params.append(page_size)
+
+        with self.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        return rows[::-1] if before_id is not None else rows
+
+    def bank_stats(self):
+        """Totals kept current by the migration 6 triggers: one row read, no table scans."""
+        with self.connection() as conn:
+            stats = dict(conn.execute("SELECT * FROM bank_stats WHERE id = 1").fetchone())
+            stats['by_type'] = {row['transaction_type']: (row['tx_count'], row['amount']) for row in
+                                conn.execute("SELECT * FROM transaction_type_stats WHERE tx_count > 0 ORDER BY transaction_type")}
+        del stats['id']
+        return stats
+
+    def daily_volumes(self, days=14):
+        """(day, tx_count, amount) for the last `days` days that saw any activity, oldest first."""
+        with self.connection() as conn:
+            rows = conn.execute('''
+                SELECT day, SUM(tx_count) AS tx_count, SUM(amount) AS amount FROM daily_stats
+                WHERE day >= date('now', ?) GROUP BY day HAVING SUM(tx_count) > 0 ORDER BY day
+            ''', (f"-{days - 1} days",)).fetchall()
+        return [tuple(row) for row in rows]
+
+    def explain(self, sql, params=()):
+        """Returns the EXPLAIN QUERY PLAN detail lines for a query."""
+        with self.connection() as conn:
+            return [row['detail'] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
 
 # Shared instance
 db = Database()
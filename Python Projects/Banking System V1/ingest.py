@@ -0,0 +1,185 @@
+
+"""************************************"""
+"""    Code By Vinzuda Manthan S.      """
+"""************************************"""
+
+# Bulk loader for branch end-of-day files.
+#   python ingest.py eod.csv --chunk 5000 --rejects rejected.csv
+# CSV needs a header with account_number, type, amount. JSONL lines use the same keys.
+
+import argparse
+import csv
+import json
+import math
+import os
+import sys
+import time
+from database import db
+from ledger import MIN_BALANCE
+
+TYPE_ALIASES = {
+    "deposit": "Deposit", "credit": "Deposit",
+    "withdrawal": "Withdrawal", "withdraw": "Withdrawal", "debit": "Withdrawal",
+}
+
+# Keeps IN (...) lists under SQLite's bound-parameter limit
+LOOKUP_BATCH = 500
+
+class IngestReport:
+    """Outcome of one ingest run."""
+
+    def __init__(self):
+        self.accepted = 0
+        self.rejected = []      # (line_no, raw_row, reason)
+        self.elapsed = 0.0
+        self.chunks = 0
+
+    @property
+    def total(self):
+        return self.accepted + len(self.rejected)
+
+    @property
+    def rows_per_sec(self):
+        return self.total / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return (f"{self.accepted:,} accepted, {len(self.rejected):,} rejected in {self.chunks} chunks | "
+                f"{self.elapsed:.2f}s ({self.rows_per_sec:,.0f} rows/sec)")
+
+def read_rows(path):
+    """Streams (line_no, row_dict) from a CSV or JSONL file without loading it all."""
+    with open(path, newline='', encoding='utf-8') as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError:
+                    row = None
+                yield line_no, row if isinstance(row, dict) else {"_raw": line.rstrip("\n")}
+        else:
+            for line_no, row in enumerate(csv.DictReader(f), 2):
+                yield line_no, row
+
+def parse_row(row):
+    """Returns (account_number, tx_type, amount) or raises ValueError with a reason."""
+    if "_raw" in row:
+        raise ValueError("unparseable line")
+    acc = str(row.get("account_number") or "").strip()
+    if not acc:
+        raise ValueError("missing account_number")
+    tx_type = TYPE_ALIASES.get(str(row.get("type") or "").strip().lower())
+    if not tx_type:
+        raise ValueError(f"unknown type {row.get('type')!r}")
+    try:
+        amount = float(row.get("amount"))
+    except (TypeError, ValueError):
+        raise ValueError(f"bad amount {row.get('amount')!r}")
+    if not math.isfinite(amount) or amount <= 0:
+        raise ValueError(f"amount must be a positive finite number, got {row.get('amount')!r}")
+    return acc, tx_type, amount
+
+def chunked(rows, size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+class BulkIngestor:
+    """Applies large batches of deposits/withdrawals, one transaction per chunk."""
+
+    def __init__(self, database=db, chunk_size=5000, min_balance=MIN_BALANCE):
+        self.db = database
+        self.chunk_size = chunk_size
+        self.min_balance = min_balance
+
+    def _balances(self, conn, accounts):
+        balances = {}
+        accounts = list(accounts)
+        for i in range(0, len(accounts), LOOKUP_BATCH):
+            batch = accounts[i:i + LOOKUP_BATCH]
+            marks = ",".join("?" * len(batch))
+            for row in conn.execute(
+                    f"SELECT account_number, balance FROM users WHERE is_active = 1 AND account_number IN ({marks})", batch):
+                balances[row['account_number']] = row['balance']
+        return balances
+
+    def _apply_chunk(self, chunk, report):
+        parsed = []
+        for line_no, row in chunk:
+            try:
+                parsed.append((line_no, row) + parse_row(row))
+            except ValueError as e:
+                report.rejected.append((line_no, row, str(e)))
+
+        with self.db.transaction() as conn:
+            # Rows are replayed in file order against balances read under the write lock
+            balances = self._balances(conn, {p[2] for p in parsed})
+            start_balances = dict(balances)
+            tx_rows = []
+            for line_no, row, acc, tx_type, amount in parsed:
+                if acc not in balances:
+                    report.rejected.append((line_no, row, "account not found or inactive"))
+                    continue
+                delta = amount if tx_type == "Deposit" else -amount
+                if delta < 0 and balances[acc] + delta < self.min_balance:
+                    report.rejected.append((line_no, row, f"would breach minimum ₹{self.min_balance} balance"))
+                    continue
+                balances[acc] += delta
+                tx_rows.append((acc, tx_type, amount, balances[acc]))
+
+            conn.executemany('''
+                INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
+                VALUES (?, ?, ?, ?)
+            ''', tx_rows)
+            # One UPDATE per touched account. It stores the final balance itself, read under
+            # the same write lock, so it always equals the last balance_after written
+            conn.executemany("UPDATE users SET balance = ? WHERE account_number = ?",
+                             [(balances[acc], acc) for acc, start in start_balances.items()
+                              if balances[acc] != start])
+        report.accepted += len(tx_rows)
+        report.chunks += 1
+
+    def ingest_rows(self, rows):
+        report = IngestReport()
+        start = time.perf_counter()
+        for chunk in chunked(rows, self.chunk_size):
+            self._apply_chunk(chunk, report)
+        report.elapsed = time.perf_counter() - start
+        report.rejected.sort(key=lambda r: r[0])
+        return report
+
+    def ingest_file(self, path):
+        return self.ingest_rows(read_rows(path))
+
+def write_rejects(report, path):
+    with open(path, "w", newline='', encoding='utf-8') as f:
+        w = csv.writer(f)
+        w.writerow(["line", "reason", "row"])
+        for line_no, row, reason in report.rejected:
+            w.writerow([line_no, reason, json.dumps(row)])
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-load deposits/withdrawals from CSV or JSONL.")
+    parser.add_argument("path")
+    parser.add_argument("--chunk", type=int, default=5000, help="rows per database transaction")
+    parser.add_argument("--rejects", help="write rejected rows to this CSV")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        print(f"File not found: {args.path}")
+        return 1
+    report = BulkIngestor(chunk_size=args.chunk).ingest_file(args.path)
+    print(report.summary())
+    if args.rejects and report.rejected:
+        write_rejects(report, args.rejects)
+        print(f"Rejected rows written to {args.rejects}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
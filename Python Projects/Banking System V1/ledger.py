@@ -0,0 +1,137 @@
+
+"""************************************"""
+"""    Code By Vinzuda Manthan S.      """
+"""************************************"""
+
+import time
+from database import db
+
+MIN_BALANCE = 500
+
+class LedgerError(Exception):
+    """Raised when a balance change is rejected; the transaction is rolled back."""
+
+class AccountUnavailable(LedgerError):
+    pass
+
+class InsufficientFunds(LedgerError):
+    pass
+
+class Ledger:
+    """Applies balance changes atomically.
+
+    Every operation runs inside BEGIN IMMEDIATE and moves money with
+    `balance = balance + ?` so concurrent sessions never overwrite each
+    other. The new balance comes back from RETURNING (SQLite 3.35+), so
+    callers do not need to re-select the user row.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+
+    def _apply(self, conn, acc_num, delta, min_balance=None):
+        sql = "UPDATE users SET balance = balance + ? WHERE account_number = ? AND is_active = 1"
+        params = [delta, acc_num]
+        if min_balance is not None:
+            sql += " AND balance + ? >= ?"
+            params += [delta, min_balance]
+        rows = conn.execute(sql + " RETURNING balance", params).fetchall()
+        if rows:
+            return rows[0]['balance']
+
+        user = conn.execute("SELECT is_active FROM users WHERE account_number = ?", (acc_num,)).fetchone()
+        if not user or not user['is_active']:
+            raise AccountUnavailable(f"Account {acc_num} not found or inactive.")
+        raise InsufficientFunds(f"Must maintain minimum ₹{min_balance} balance.")
+
+    def _record(self, conn, acc_num, tx_type, amount, balance_after, related=None):
+        conn.execute('''
+            INSERT INTO transactions (account_number, transaction_type, amount, balance_after, related_account)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (acc_num, tx_type, amount, balance_after, related))
+
+    def deposit(self, acc_num, amount, tx_type="Deposit"):
+        """Credits `amount` and returns the new balance."""
+        with self.db.transaction() as conn:
+            balance = self._apply(conn, acc_num, amount)
+            self._record(conn, acc_num, tx_type, amount, balance)
+        return balance
+
+    def withdraw(self, acc_num, amount, min_balance=MIN_BALANCE, tx_type="Withdrawal"):
+        """Debits `amount` if at least `min_balance` remains; returns the new balance."""
+        with self.db.transaction() as conn:
+            balance = self._apply(conn, acc_num, -amount, min_balance)
+            self._record(conn, acc_num, tx_type, amount, balance)
+        return balance
+
+    def transfer(self, from_acc, to_acc, amount, min_balance=MIN_BALANCE):
+        """Moves money between accounts; returns (sender_balance, receiver_balance)."""
+        if from_acc == to_acc:
+            raise LedgerError("Cannot transfer to yourself.")
+        with self.db.transaction() as conn:
+            sender_bal = self._apply(conn, from_acc, -amount, min_balance)
+            receiver_bal = self._apply(conn, to_acc, amount)
+            self._record(conn, from_acc, "Transfer Sent", amount, sender_bal, to_acc)
+            self._record(conn, to_acc, "Transfer Received", amount, receiver_bal, from_acc)
+        return sender_bal, receiver_bal
+
+    def credit_interest(self, acc_num, rate, month):
+        """Credits one month's interest; returns (interest, new_balance) or None if already paid."""
+        with self.db.transaction() as conn:
+            # The write lock is held, so this balance cannot change before the UPDATE
+            user = conn.execute("SELECT balance FROM users WHERE account_number = ? AND is_active = 1",
+                                (acc_num,)).fetchone()
+            if not user:
+                raise AccountUnavailable(f"Account {acc_num} not found or inactive.")
+            interest = user['balance'] * rate
+            claimed = conn.execute("INSERT OR IGNORE INTO interest_runs (account_number, month, amount) VALUES (?, ?, ?)",
+                                   (acc_num, month, interest)).rowcount
+            if not claimed:
+                return None
+            balance = self._apply(conn, acc_num, interest)
+            self._record(conn, acc_num, "Interest Credit", interest, balance)
+        return interest, balance
+
+    def run_monthly_interest(self, month, rate=0.04, chunk_size=1000, progress=None):
+        """Credits interest to every active, unfrozen Savings account in set-based chunks.
+
+        Each chunk is a users.id range committed on its own, so the write lock
+        is only held briefly. interest_runs makes re-runs skip accounts that
+        were already paid. `progress(chunk_no, credited, seconds)` is called
+        after each chunk. Returns (accounts_credited, total_interest).
+        """
+        eligible = '''
+            WHERE u.account_type = 'Savings' AND u.is_active = 1 AND u.is_frozen = 0
+            AND u.id >= ? AND u.id < ?
+            AND NOT EXISTS (SELECT 1 FROM interest_runs r WHERE r.account_number = u.account_number AND r.month = ?)
+        '''
+        with self.db.connection() as conn:
+            max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM users").fetchone()[0]
+
+        credited, total = 0, 0.0
+        for chunk_no, lo in enumerate(range(1, max_id + 1, chunk_size), 1):
+            start = time.perf_counter()
+            span = (lo, lo + chunk_size, month)
+            with self.db.transaction() as conn:
+                last_tx = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+                conn.execute(f'''
+                    INSERT INTO transactions (account_number, transaction_type, amount, balance_after)
+                    SELECT u.account_number, 'Interest Credit', u.balance * ?, u.balance + u.balance * ?
+                    FROM users u {eligible}
+                ''', (rate, rate) + span)
+                conn.execute(f"UPDATE users AS u SET balance = balance + balance * ? {eligible}",
+                             (rate,) + span)
+                conn.execute('''
+                    INSERT INTO interest_runs (account_number, month, amount)
+                    SELECT account_number, ?, amount FROM transactions WHERE id > ?
+                ''', (month, last_tx))
+                n, amount = conn.execute("SELECT COUNT(*), COALESCE(SUM(amount), 0) FROM transactions WHERE id > ?",
+                                         (last_tx,)).fetchone()
+            credited += n
+            total += amount
+            if progress:
+                progress(chunk_no, n, time.perf_counter() - start)
+        return credited, total
+
+# Shared instance
+ledger = Ledger()
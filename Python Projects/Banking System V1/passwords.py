@@ -0,0 +1,66 @@
+
+"""************************************"""
+"""    Code By Vinzuda Manthan S.      """
+"""************************************"""
+
+import os
+import bcrypt
+from concurrent.futures import ProcessPoolExecutor
+
+# bcrypt work factor; every +1 doubles the hashing time.
+BCRYPT_ROUNDS = int(os.environ.get("BANK_BCRYPT_ROUNDS", 12))
+
+# Worker functions live at module level so the process pool can pickle them.
+def _hash(password, rounds):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds)).decode('utf-8')
+
+def _check(password, hashed):
+    return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+
+class PasswordHasher:
+    """Runs bcrypt on a process pool so hashing never blocks the caller's thread.
+
+    `hash_async` / `verify_async` return futures; `hash` / `verify` are the
+    blocking shortcuts. The pool starts on first use.
+    """
+
+    def __init__(self, rounds=BCRYPT_ROUNDS, workers=None):
+        self.rounds = rounds
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    def hash_async(self, password):
+        return self._executor().submit(_hash, password, self.rounds)
+
+    def verify_async(self, password, hashed):
+        return self._executor().submit(_check, password, hashed)
+
+    def hash(self, password):
+        return self.hash_async(password).result()
+
+    def verify(self, password, hashed):
+        return self.verify_async(password, hashed).result()
+
+    @staticmethod
+    def cost_of(hashed):
+        """Work factor stored in a hash like '$2b$12$...'."""
+        try:
+            return int(hashed.split('$')[2])
+        except (IndexError, ValueError):
+            return None
+
+    def needs_rehash(self, hashed):
+        return self.cost_of(hashed) != self.rounds
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+# Shared instance
+hasher = PasswordHasher()
@@ -0,0 +1,67 @@
+
+"""************************************"""
+"""    Code By Vinzuda Manthan S.      """
+"""************************************"""
+
+import threading
+from database import db
+
+# Everything the dashboard and account screens show; the password hash is never cached.
+SESSION_COLUMNS = ("full_name", "account_number", "ifsc_code", "account_type",
+                   "balance", "is_active", "is_frozen", "created_at")
+
+class SessionCache:
+    """Write-through cache of logged-in user records, keyed by account number.
+
+    Ledger operations push their returned balance in with `set_balance`, so a
+    dashboard session costs one query per mutation. Admin actions that change
+    an account behind the session's back call `invalidate`.
+    """
+
+    def __init__(self, database=db):
+        self.db = database
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def put(self, user):
+        record = {col: user[col] for col in SESSION_COLUMNS}
+        with self._lock:
+            self._users[record['account_number']] = record
+        return record
+
+    def load(self, acc_num):
+        with self.db.connection() as conn:
+            row = conn.execute(f"SELECT {', '.join(SESSION_COLUMNS)} FROM users WHERE account_number = ?",
+                               (acc_num,)).fetchone()
+        if row is None:
+            self.invalidate(acc_num)
+            return None
+        return self.put(row)
+
+    def get(self, acc_num):
+        with self._lock:
+            record = self._users.get(acc_num)
+        return record if record is not None else self.load(acc_num)
+
+    def set_balance(self, acc_num, balance):
+        with self._lock:
+            record = self._users.get(acc_num)
+            if record is not None:
+                record['balance'] = balance
+
+    def password_hash(self, acc_num):
+        """Fetched on demand for the few screens that re-check the password."""
+        with self.db.connection() as conn:
+            row = conn.execute("SELECT password_hash FROM users WHERE account_number = ?", (acc_num,)).fetchone()
+        return row['password_hash'] if row else None
+
+    def invalidate(self, acc_num):
+        with self._lock:
+            self._users.pop(acc_num, None)
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+# Shared instance
+sessions = SessionCache()
@@ -2,22 +2,55 @@ import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import sqlite3
 import bcrypt
-import random
 import datetime
 import csv
 import os
+import json
+import gzip
+import threading
+import queue
+import time
+import hashlib
+import secrets
 import qrcode
 from PIL import Image, ImageTk
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from matplotlib.figure import Figure
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from contextlib import contextmanager
 import io
 
+# bcrypt work factor for new hashes; older hashes are upgraded on login
+BCRYPT_ROUNDS = int(os.environ.get("NEXUS_BCRYPT_ROUNDS", 12))
+# bcrypt releases the GIL while hashing, so worker threads keep the Tk loop free
+HASH_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="bcrypt")
+
+# QR encoding is pure Python; one worker keeps it off the Tk thread
+QR_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix="qr")
+
+QR_TOKEN_TTL = 300            # seconds a QR token stays scannable
+QR_TOKEN_BYTES = 16           # secrets.token_urlsafe(16) -> 22 chars, every token the same size
+QR_REAP_INTERVAL_MS = 60000   # how often the reaper sweeps used/expired tokens
+QR_REAP_BATCH = 500           # rows deleted per reaper commit
+
+def bcrypt_cost(hashed):
+    try:
+        return int(hashed.split(b'$')[2])
+    except (IndexError, ValueError):
+        return None
+
 # --- Database Layer ---
 class Database:
-    def __init__(self):
-        self.conn = sqlite3.connect('banking_system_pro.db')
+    def __init__(self, path='banking_system_pro.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        # WAL lets background readers (statement exports) run without blocking writes
+        self.conn.execute("PRAGMA journal_mode=WAL")
         self.cursor = self.conn.cursor()
+        self.tx_depth = 0
         self.create_tables()
+        self.accounts = AccountAllocator(self)
 
     def create_tables(self):
         # Users Table
@@ -62,10 +95,26 @@ class Database:
             )
         ''')
         
+        # Account number allocator state (high-water mark + permutation key)
+        self.cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sequences (
+                name TEXT PRIMARY KEY,
+                next_value INTEGER NOT NULL,
+                secret TEXT NOT NULL
+            )
+        ''')
+        # Keyset history pages walk this index in either direction
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_tx_account_ts ON transactions (account_number, timestamp)")
+        # The reaper finds its rows through these small partial indexes instead of scanning qr_tokens
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_qr_live_expiry ON qr_tokens (expiry) WHERE is_used = 0")
+        self.cursor.execute("CREATE INDEX IF NOT EXISTS idx_qr_used ON qr_tokens (expiry) WHERE is_used = 1")
+        # Tokens issued before expiries were recorded are expired so the reaper clears them
+        self.cursor.execute("UPDATE qr_tokens SET expiry = datetime('now') WHERE expiry IS NULL")
+        
         # Default Admin
         self.cursor.execute("SELECT * FROM users WHERE email = 'admin@bank.com'")
         if not self.cursor.fetchone():
-            hashed = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt())
+            hashed = bcrypt.hashpw("admin123".encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS))
             self.cursor.execute('''
                 INSERT INTO users (full_name, email, password_hash, account_number, is_admin, balance)
                 VALUES (?, ?, ?, ?, ?, ?)
@@ -77,15 +126,306 @@ class Database:
         self.cursor.execute(sql, params)
         return self.cursor.fetchall()
 
+    def history_page(self, acc_no, page_size=10, after_id=None, before_id=None, columns="id, type, amount, timestamp"):
+        """Newest-first page of transactions using (timestamp, id) cursors instead of OFFSET."""
+        sql = f"SELECT {columns} FROM transactions WHERE account_number=?"
+        params = [acc_no]
+        if before_id is not None:
+            sql += " AND (timestamp, id) > (SELECT timestamp, id FROM transactions WHERE id=?) ORDER BY timestamp, id"
+            params.append(before_id)
+        elif after_id is not None:
+            sql += " AND (timestamp, id) < (SELECT timestamp, id FROM transactions WHERE id=?) ORDER BY timestamp DESC, id DESC"
+            params.append(after_id)
+        else:
+            sql += " ORDER BY timestamp DESC, id DESC"
+        sql += " LIMIT ?"
+        params.append(page_size)
+        rows = self.query(sql, params)
+        return rows[::-1] if before_id is not None else rows
+
     def execute(self, sql, params=()):
+        """Runs one statement. Outside a transaction() block it commits straight away
+        and reports errors as False; inside one the error propagates so the whole
+        unit rolls back instead of committing half of it."""
         try:
             self.cursor.execute(sql, params)
-            self.conn.commit()
+            if not self.tx_depth: self.conn.commit()
             return True
         except sqlite3.Error as e:
+            if self.tx_depth: raise
+            # Drop the implicit transaction the failed statement opened, or it keeps the write lock
+            self.conn.rollback()
             print(f"DB Error: {e}")
             return False
 
+    @contextmanager
+    def transaction(self):
+        """Unit of work: every statement in the block lands in a single commit (one fsync).
+
+        The outermost block takes the write lock with BEGIN IMMEDIATE, so balances
+        read inside it cannot change underneath. Nested blocks become savepoints
+        and roll back on their own without aborting the outer unit.
+        """
+        depth = self.tx_depth
+        self.cursor.execute("BEGIN IMMEDIATE" if depth == 0 else f"SAVEPOINT sp{depth}")
+        self.tx_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if depth == 0: self.conn.rollback()
+            else: self.cursor.execute(f"ROLLBACK TO sp{depth}"); self.cursor.execute(f"RELEASE sp{depth}")
+            raise
+        else:
+            if depth == 0: self.conn.commit()
+            else: self.cursor.execute(f"RELEASE sp{depth}")
+        finally:
+            self.tx_depth = depth
+
+    def issue_qr_token(self, acc_no, t_type, amount, ttl=QR_TOKEN_TTL):
+        """Stores a new single-use token that expires `ttl` seconds from now and returns it."""
+        token = secrets.token_urlsafe(QR_TOKEN_BYTES)
+        self.execute("INSERT INTO qr_tokens (token, account_number, type, amount, expiry) VALUES (?,?,?,?,datetime('now', ?))",
+                     (token, acc_no, t_type, amount, f"{ttl:+d} seconds"))
+        return token
+
+    def reap_qr_tokens(self, batch_size=QR_REAP_BATCH):
+        """Deletes up to `batch_size` used or expired tokens in one commit; returns the count."""
+        with self.transaction():
+            self.cursor.execute("DELETE FROM qr_tokens WHERE rowid IN (SELECT rowid FROM qr_tokens WHERE is_used = 1 LIMIT ?)",
+                                (batch_size,))
+            deleted = self.cursor.rowcount
+            self.cursor.execute('''
+                DELETE FROM qr_tokens WHERE rowid IN (
+                    SELECT rowid FROM qr_tokens WHERE is_used = 0 AND expiry <= datetime('now') LIMIT ?)
+            ''', (batch_size - deleted,))
+            deleted += self.cursor.rowcount
+        return deleted
+
+    def post_transaction(self, acc_no, t_type, amount, delta):
+        """Applies `delta` to the balance and logs it as one unit; returns the new balance."""
+        with self.transaction():
+            balance = self.query("SELECT balance FROM users WHERE account_number=?", (acc_no,))[0][0] + delta
+            self.execute("UPDATE users SET balance=? WHERE account_number=?", (balance, acc_no))
+            self.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
+                         (acc_no, t_type, amount, balance))
+        return balance
+
+class AccountAllocator:
+    """Unique NEX###### numbers from a scrambled counter.
+
+    A counter is scrambled by a keyed 4-round Feistel network over 000000-999999
+    (a bijection, so two counters never map to the same number) and counters
+    are reserved from the `sequences` table a block at a time, in one write
+    transaction so two app instances never get the same block. Older accounts
+    were given random NEX numbers, so a permuted number that is already taken
+    is skipped in favour of the next counter.
+    """
+    HALF = 1000
+
+    def __init__(self, db, block_size=50):
+        self.db = db
+        self.block_size = block_size
+        self.next_value = self.limit = 0
+        self.key = None
+
+    def _reserve(self):
+        with self.db.transaction():
+            self.db.execute("INSERT OR IGNORE INTO sequences (name, next_value, secret) VALUES ('account_number', 0, ?)",
+                            (secrets.token_hex(16),))
+            limit, secret = self.db.query("UPDATE sequences SET next_value = next_value + ? WHERE name = 'account_number' "
+                                          "RETURNING next_value, secret", (self.block_size,))[0]
+        self.next_value, self.limit, self.key = limit - self.block_size, limit, bytes.fromhex(secret)
+
+    def _permute(self, n):
+        left, right = divmod(n, self.HALF)
+        for r in range(4):
+            digest = hashlib.blake2b(f"{r}:{right}".encode(), key=self.key, digest_size=4).digest()
+            left, right = right, (left + int.from_bytes(digest, "big")) % self.HALF
+        return left * self.HALF + right
+
+    def next(self):
+        while True:
+            if self.next_value >= self.limit:
+                self._reserve()
+            if self.next_value >= self.HALF * self.HALF:
+                raise OverflowError("NEX account number space exhausted")
+            n, self.next_value = self.next_value, self.next_value + 1
+            acc_no = f"NEX{self._permute(n):06d}"
+            if not self.db.query("SELECT 1 FROM users WHERE account_number = ?", (acc_no,)):
+                return acc_no
+
+class StatementExporter:
+    """Streams an account statement to CSV or JSONL (optionally gzipped) on a worker thread.
+
+    Rows are pulled off a single cursor with fetchmany(), so memory stays flat
+    however long the history is. The worker owns its own connection and only
+    updates counters; the Tk side polls them with after(). The file is written
+    to `<path>.part` and renamed on success, so a cancelled export leaves nothing.
+    The format is passed in explicitly; the file name has no say in it.
+    """
+    # Dialog label -> (extension, fmt, compress)
+    FORMATS = {"CSV": (".csv", "csv", False), "JSONL": (".jsonl", "jsonl", False),
+               "CSV (gzip)": (".csv.gz", "csv", True), "JSONL (gzip)": (".jsonl.gz", "jsonl", True)}
+    COLUMNS = ("type", "amount", "balance_after", "timestamp")
+    HEADER = ("Type", "Amount", "Balance After", "Timestamp")
+
+    def __init__(self, db_path, acc_no, path, date_from=None, date_to=None, fmt="csv", compress=False, chunk_size=None):
+        if fmt not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown statement format {fmt!r}")
+        self.db_path = db_path
+        self.acc_no = acc_no
+        self.path = path
+        self.fmt = fmt
+        self.compress = compress
+        self.date_from = date_from
+        self.date_to = date_to
+        self.chunk_size = chunk_size or EXPORT_PAGE_SIZE
+        self.total = self.written = 0
+        self.error = None
+        self.done = False
+        self._cancel = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self.run, name="statement-export", daemon=True).start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def _filter(self):
+        sql, params = " FROM transactions WHERE account_number=?", [self.acc_no]
+        if self.date_from:
+            sql += " AND timestamp >= ?"
+            params.append(self.date_from)
+        if self.date_to:
+            sql += " AND timestamp < date(?, '+1 day')"
+            params.append(self.date_to)
+        return sql, params
+
+    def _open(self, path):
+        if self.compress:
+            return gzip.open(path, "wt", newline="", encoding="utf-8")
+        return open(path, "w", newline="", encoding="utf-8")
+
+    def run(self):
+        part = self.path + ".part"
+        conn = sqlite3.connect(self.db_path)
+        try:
+            where, params = self._filter()
+            self.total = conn.execute("SELECT COUNT(*)" + where, params).fetchone()[0]
+            cur = conn.execute(f"SELECT {', '.join(self.COLUMNS)}{where} ORDER BY timestamp, id", params)
+            as_json = self.fmt == "jsonl"
+            with self._open(part) as f:
+                writer = None if as_json else csv.writer(f)
+                if writer: writer.writerow(self.HEADER)
+                while not self._cancel.is_set():
+                    rows = cur.fetchmany(self.chunk_size)
+                    if not rows: break
+                    if as_json:
+                        f.writelines(json.dumps(dict(zip(self.COLUMNS, row))) + "\n" for row in rows)
+                    else:
+                        writer.writerows(rows)
+                    self.written += len(rows)
+            if self._cancel.is_set(): os.remove(part)
+            else: os.replace(part, self.path)
+        except Exception as e:
+            self.error = e
+            if os.path.exists(part): os.remove(part)
+        finally:
+            conn.close()
+            self.done = True
+
+class DBWorker:
+    """Owns the Database on one dedicated thread and serves requests from a queue.
+
+    sqlite3 connections belong to the thread that opened them, so every query
+    goes through here: `submit(fn)` queues fn(db) and returns a Future. Requests
+    run in order, one at a time. Each future gets `.timing = (label, wait_ms, run_ms)`
+    before it resolves, for the latency overlay.
+    """
+
+    def __init__(self, path='banking_system_pro.db'):
+        self.path = path
+        self.requests = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="db-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, fn, label="query"):
+        future = Future()
+        self.requests.put((fn, future, label, time.perf_counter()))
+        return future
+
+    def call(self, fn, label="query"):
+        """Blocking shortcut for scripts; never call this from the Tk thread."""
+        return self.submit(fn, label).result()
+
+    def stop(self):
+        self.requests.put(None)
+        self.thread.join()
+
+    def _run(self):
+        try:
+            db, failure = Database(self.path), None
+        except Exception as e:
+            db, failure = None, e
+        while True:
+            item = self.requests.get()
+            if item is None: break
+            fn, future, label, queued = item
+            if not future.set_running_or_notify_cancel(): continue
+            start = time.perf_counter()
+            try:
+                if failure: raise failure
+                result, error = fn(db), None
+            except Exception as e:
+                result, error = None, e
+            future.timing = (label, (start - queued) * 1000, (time.perf_counter() - start) * 1000)
+            if error: future.set_exception(error)
+            else: future.set_result(result)
+        if db: db.conn.close()
+
+class QRRenderer:
+    """Renders QR codes at their display size off the Tk thread.
+
+    box_size is worked out from the code's module count, so the image comes out
+    at `size` pixels apart from a little padding; there is no LANCZOS resize.
+    Encoding runs on QR_POOL and only the PhotoImage is built on the Tk thread,
+    because Tk images must be created there. Nothing is cached: every payload
+    is a fresh single-use token, so a cached image would never be shown again.
+    """
+
+    def __init__(self, app, size=240, border=1, to_photo=ImageTk.PhotoImage):
+        self.app = app
+        self.size = size
+        self.border = border
+        self.to_photo = to_photo
+
+    @staticmethod
+    def render_image(payload, size=240, fill="black", back="white", border=1):
+        qr = qrcode.QRCode(border=border)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        qr.box_size = max(1, size // (qr.modules_count + 2 * border))
+        img = qr.make_image(fill_color=fill, back_color=back).get_image()
+        if img.size[0] > size:   # payload too dense for one pixel per module
+            return img.resize((size, size), Image.Resampling.NEAREST)
+        if img.size[0] == size:
+            return img
+        canvas = Image.new(img.mode, (size, size), back)
+        offset = (size - img.size[0]) // 2
+        canvas.paste(img, (offset, offset))
+        return canvas
+
+    def request(self, payload, callback, fill="black", back="white"):
+        """Calls callback(photo) on the Tk thread once the code is encoded."""
+        def done(future):
+            callback(self.to_photo(future.result()))
+        self.app.when_done(QR_POOL.submit(self.render_image, payload, self.size, fill, back, self.border), done)
+
 # --- UI Theme ---
 COLORS = {
     "primary": "#0f172a",   # Dark Slate
@@ -100,6 +440,9 @@ COLORS = {
     "light_border": "#e2e8f0"
 }
 
+HISTORY_PAGE_SIZE = 10   # rows per "Recent Transactions" page
+EXPORT_PAGE_SIZE = 500   # rows per fetchmany() chunk when exporting
+
 class BankingApp(tk.Tk):
     def __init__(self):
         super().__init__()
@@ -107,15 +450,75 @@ class BankingApp(tk.Tk):
         self.geometry("1200x800")
         self.configure(bg=COLORS["bg"])
         
-        self.db = Database()
+        self.db = DBWorker()
+        self.qr = QRRenderer(self)
         self.current_user = None
         self.active_token = None
         
         self.container = tk.Frame(self, bg=COLORS["bg"])
         self.container.pack(fill="both", expand=True)
         
+        # Per-query latency overlay (F2 toggles it)
+        self.db_timings = deque(maxlen=50)
+        self.latency_lbl = tk.Label(self, text="DB idle", font=("Consolas", 8), bg=COLORS["primary"], fg="white", padx=8, pady=3)
+        self.latency_lbl.place(relx=1.0, rely=1.0, anchor="se")
+        self.bind("<F2>", lambda e: self.latency_lbl.place_forget() if self.latency_lbl.winfo_ismapped()
+                  else self.latency_lbl.place(relx=1.0, rely=1.0, anchor="se"))
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        self.after(QR_REAP_INTERVAL_MS, self.reap_qr_tokens)
         self.show_login_screen()
 
+    def reap_qr_tokens(self):
+        """Periodic job. Each batch is its own worker request, so UI queries get in between batches.
+
+        A failed batch (locked or unwritable DB) is logged and retried on the next sweep.
+        """
+        def reaped(deleted):
+            if deleted >= QR_REAP_BATCH: reap_batch()
+            else: self.after(QR_REAP_INTERVAL_MS, self.reap_qr_tokens)
+        def failed(e):
+            print(f"QR reaper error: {e}")
+            self.after(QR_REAP_INTERVAL_MS, self.reap_qr_tokens)
+        def reap_batch():
+            self.db_call(lambda db: db.reap_qr_tokens(), reaped, label="reap QR tokens", on_error=failed)
+        reap_batch()
+
+    def on_close(self):
+        self.db.stop()
+        self.destroy()
+
+    def when_done(self, future, callback, poll_ms=16):
+        """Polls a future from the Tk loop (one frame at 60 fps) and calls callback(future) on this thread."""
+        def poll():
+            if future.done(): callback(future)
+            else: self.after(poll_ms, poll)
+        self.after(poll_ms, poll)
+
+    def run_in_background(self, fn, callback, poll_ms=20):
+        """Runs fn on the hash pool and hands its result to callback on the Tk thread."""
+        self.when_done(HASH_POOL.submit(fn), lambda f: callback(f.result()), poll_ms)
+
+    def db_call(self, fn, callback=None, label="query", on_error=None):
+        """Queues fn(db) on the DB worker; callback(result) runs on the Tk thread.
+
+        Errors go to on_error(exception) when given, otherwise to an error dialog.
+        """
+        def done(future):
+            self.record_timing(*future.timing)
+            if future.exception():
+                if on_error: return on_error(future.exception())
+                return messagebox.showerror("Database Error", str(future.exception()))
+            if callback: callback(future.result())
+        self.when_done(self.db.submit(fn, label), done)
+
+    def record_timing(self, label, wait_ms, run_ms):
+        self.db_timings.append(run_ms)
+        avg = sum(self.db_timings) / len(self.db_timings)
+        self.latency_lbl.config(text=f"DB {label}: {run_ms:.1f} ms (+{wait_ms:.1f} queued) | "
+                                     f"avg {avg:.1f} | max {max(self.db_timings):.1f}")
+        self.latency_lbl.lift()
+
     def clear_screen(self):
         for widget in self.container.winfo_children():
             widget.destroy()
@@ -138,19 +541,38 @@ class BankingApp(tk.Tk):
         e_pass.pack(pady=(5, 25), ipady=8)
         
         def do_login():
-            user_data = self.db.query("SELECT * FROM users WHERE email = ? AND is_active = 1", (e_mail.get(),))
-            if user_data and bcrypt.checkpw(e_pass.get().encode('utf-8'), user_data[0][6]):
+            email, pwd = e_mail.get(), e_pass.get().encode('utf-8')
+            login_btn.config(state="disabled", text="Signing in...")
+            
+            def check(user_data):
+                if not login_btn.winfo_exists(): return
+                if not user_data:
+                    login_btn.config(state="normal", text="Sign In")
+                    return messagebox.showerror("Error", "Invalid login details or frozen account.")
                 u = user_data[0]
-                self.current_user = {
-                    "id": u[0], "name": u[1], "email": u[4], 
-                    "acc_no": u[7], "type": u[9], "balance": u[10], "is_admin": u[12]
-                }
-                self.show_dashboard()
-            else:
-                messagebox.showerror("Error", "Invalid login details or frozen account.")
+                
+                def finish(ok):
+                    if not login_btn.winfo_exists(): return
+                    login_btn.config(state="normal", text="Sign In")
+                    if not ok:
+                        return messagebox.showerror("Error", "Invalid login details or frozen account.")
+                    self.current_user = {
+                        "id": u[0], "name": u[1], "email": u[4], 
+                        "acc_no": u[7], "type": u[9], "balance": u[10], "is_admin": u[12]
+                    }
+                    if bcrypt_cost(u[6]) != BCRYPT_ROUNDS:
+                        self.run_in_background(lambda: bcrypt.hashpw(pwd, bcrypt.gensalt(BCRYPT_ROUNDS)),
+                                               lambda new_hash: self.db_call(lambda db: db.execute("UPDATE users SET password_hash=? WHERE id=?", (new_hash, u[0])),
+                                                                             label="rehash password"))
+                    self.show_dashboard()
+                
+                self.run_in_background(lambda: bcrypt.checkpw(pwd, u[6]), finish)
+            
+            self.db_call(lambda db: db.query("SELECT * FROM users WHERE email = ? AND is_active = 1", (email,)), check, label="login lookup")
 
-        tk.Button(frame, text="Sign In", bg=COLORS["accent"], fg="white", font=("Inter", 11, "bold"), 
-                  command=do_login, bd=0, cursor="hand2", width=30).pack(ipady=8)
+        login_btn = tk.Button(frame, text="Sign In", bg=COLORS["accent"], fg="white", font=("Inter", 11, "bold"), 
+                              command=do_login, bd=0, cursor="hand2", width=30)
+        login_btn.pack(ipady=8)
         
         tk.Button(frame, text="Don't have an account? Register", fg=COLORS["accent"], bg="white", bd=0, 
                   command=self.show_registration, font=("Inter", 9)).pack(pady=10)
@@ -177,18 +599,26 @@ class BankingApp(tk.Tk):
         def register():
             try:
                 name, email, phone, dep, pwd = [entries[k].get() for k in labels]
-                if float(dep) < 1000: return messagebox.showwarning("Min Balance", "Minimum ₹1000 required")
-                
-                acc_no = f"NEX{random.randint(100000, 999999)}"
-                hashed = bcrypt.hashpw(pwd.encode('utf-8'), bcrypt.gensalt())
-                
-                if self.db.execute("INSERT INTO users (full_name, email, phone, balance, password_hash, account_number, account_type) VALUES (?,?,?,?,?,?,?)",
-                                   (name, email, phone, float(dep), hashed, acc_no, "Savings")):
-                    self.db.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
-                                    (acc_no, "Initial", float(dep), float(dep)))
-                    messagebox.showinfo("Success", f"Account Created!\nAcc No: {acc_no}")
-                    self.show_login_screen()
-            except: messagebox.showerror("Error", "Invalid inputs")
+                dep = float(dep)
+                if dep < 1000: return messagebox.showwarning("Min Balance", "Minimum ₹1000 required")
+            except: return messagebox.showerror("Error", "Invalid inputs")
+            
+            def insert(db, hashed):
+                acc_no = db.accounts.next()
+                if not db.execute("INSERT INTO users (full_name, email, phone, balance, password_hash, account_number, account_type) VALUES (?,?,?,?,?,?,?)",
+                                  (name, email, phone, dep, hashed, acc_no, "Savings")):
+                    return None
+                db.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
+                           (acc_no, "Initial", dep, dep))
+                return acc_no
+            
+            def done(acc_no):
+                if not acc_no: return messagebox.showerror("Error", "Could not create account. The email may already be registered.")
+                messagebox.showinfo("Success", f"Account Created!\nAcc No: {acc_no}")
+                self.show_login_screen()
+            
+            self.run_in_background(lambda: bcrypt.hashpw(pwd.encode('utf-8'), bcrypt.gensalt(BCRYPT_ROUNDS)),
+                                   lambda hashed: self.db_call(lambda db: insert(db, hashed), done, label="register"))
 
         tk.Button(inner, text="Register Now", bg=COLORS["success"], fg="white", font=("Inter", 10, "bold"), width=25, command=register, bd=0).grid(row=7, columnspan=2, pady=20, ipady=8)
         tk.Button(inner, text="Back to Login", command=self.show_login_screen, bg="white", bd=0, fg=COLORS["secondary"]).grid(row=8, columnspan=2)
@@ -208,7 +638,7 @@ class BankingApp(tk.Tk):
             ("QR Transactions", self.show_qr_portal),
             ("Deposit Cash", self.show_deposit),
             ("Withdraw Cash", self.show_withdraw),
-            ("Statements", self.export_csv),
+            ("Statements", self.export_statement),
             ("Logout", self.show_login_screen)
         ]
         
@@ -223,8 +653,14 @@ class BankingApp(tk.Tk):
         self.render_home()
 
     def render_home(self):
-        u = self.db.query("SELECT balance FROM users WHERE id=?", (self.current_user["id"],))[0]
-        self.current_user["balance"] = u[0]
+        user_id, acc_no = self.current_user["id"], self.current_user["acc_no"]
+        def load(db):
+            return db.query("SELECT balance FROM users WHERE id=?", (user_id,))[0][0], db.history_page(acc_no, HISTORY_PAGE_SIZE)
+        self.db_call(load, self._render_home, label="dashboard")
+
+    def _render_home(self, data):
+        if not self.main_content.winfo_exists(): return
+        self.current_user["balance"], first_page = data
         
         for w in self.main_content.winfo_children(): w.destroy()
         
@@ -243,15 +679,54 @@ class BankingApp(tk.Tk):
         hist = tk.LabelFrame(bottom, text="Recent Transactions", bg="white", font=("Inter", 10, "bold"), padx=15, pady=15, highlightthickness=1, highlightbackground=COLORS["light_border"])
         hist.pack(side="left", fill="both", expand=True)
         
-        tree = ttk.Treeview(hist, columns=("1","2","3"), show="headings", height=10)
+        tree = ttk.Treeview(hist, columns=("1","2","3"), show="headings", height=HISTORY_PAGE_SIZE)
         tree.heading("1", text="Type")
         tree.heading("2", text="Amount")
         tree.heading("3", text="Date & Time")
         tree.column("1", width=120); tree.column("2", width=120); tree.column("3", width=180)
         
-        txs = self.db.query("SELECT type, amount, timestamp FROM transactions WHERE account_number=? ORDER BY id DESC LIMIT 10", (self.current_user["acc_no"],))
-        for t in txs: tree.insert("", "end", values=t)
+        nav = tk.Frame(hist, bg="white")
+        nav.pack(side="bottom", fill="x", pady=(10, 0))
         tree.pack(fill="both", expand=True)
+        
+        acc_no = self.current_user["acc_no"]
+        state = {"rows": [], "next": None, "page": 0}
+        
+        def show(rows):
+            if not tree.winfo_exists(): return
+            state["rows"], state["next"] = rows, None
+            tree.delete(*tree.get_children())
+            for t in rows: tree.insert("", "end", values=t[1:])
+            older_btn.config(state="disabled")
+            newer_btn.config(state="normal" if state["page"] > 0 else "disabled")
+            page_lbl.config(text=f"Page {state['page'] + 1}")
+            if rows:
+                # Prefetch the older page in the background so "Older" is instant
+                def prefetched(next_rows):
+                    if state["rows"] is rows and older_btn.winfo_exists():
+                        state["next"] = next_rows
+                        older_btn.config(state="normal" if next_rows else "disabled")
+                self.db_call(lambda db: db.history_page(acc_no, HISTORY_PAGE_SIZE, after_id=rows[-1][0]), prefetched, label="prefetch page")
+        
+        def older():
+            if state["next"]:
+                state["page"] += 1
+                show(state["next"])
+        
+        def newer():
+            if state["page"] > 0 and state["rows"]:
+                state["page"] -= 1
+                first = state["rows"][0][0]
+                self.db_call(lambda db: db.history_page(acc_no, HISTORY_PAGE_SIZE, before_id=first), show, label="newer page")
+        
+        newer_btn = tk.Button(nav, text="‹ Newer", command=newer, bg="white", bd=0, fg=COLORS["accent"], cursor="hand2")
+        newer_btn.pack(side="left")
+        older_btn = tk.Button(nav, text="Older ›", command=older, bg="white", bd=0, fg=COLORS["accent"], cursor="hand2")
+        older_btn.pack(side="right")
+        page_lbl = tk.Label(nav, bg="white", fg="#64748b", font=("Inter", 9))
+        page_lbl.pack()
+        
+        show(first_page)
 
     # --- PROFESSIONAL QR PORTAL ---
     def show_qr_portal(self):
@@ -300,28 +775,28 @@ class BankingApp(tk.Tk):
                 if amt <= 0: raise ValueError
                 if q_type.get() == "QR Withdraw" and amt > self.current_user["balance"]:
                     return messagebox.showerror("Low Balance", "You do not have enough funds.")
-                
-                token = f"TXN-{random.randint(1000, 9999)}-{self.current_user['acc_no']}-{amt}"
-                self.db.execute("INSERT INTO qr_tokens (token, account_number, type, amount) VALUES (?,?,?,?)",
-                                (token, self.current_user["acc_no"], q_type.get(), amt))
-                
-                # Generate Styled QR (Using Brand Colors)
-                qr = qrcode.QRCode(version=1, box_size=10, border=1)
-                qr.add_data(token)
-                qr.make(fit=True)
-                # COLORS["primary"] is the dark slate used in bank theme
-                img = qr.make_image(fill_color=COLORS["primary"], back_color="white")
-                
-                img_tk = ImageTk.PhotoImage(img.resize((240, 240), Image.Resampling.LANCZOS))
-                self.qr_display.config(image=img_tk, text="")
-                self.qr_display.image = img_tk
-                
-                self.qr_footer.config(text=f"Scan to {q_type.get()} ₹{amt:,.2f}", fg=COLORS["primary"], font=("Inter", 9, "bold"))
-                
-                sim_btn.config(state="normal", text=f"Scan & Confirm ₹{amt}", bg=COLORS["success"])
-                self.active_token = token
-                
-            except ValueError: messagebox.showerror("Error", "Please enter a valid amount.")
+            except ValueError: return messagebox.showerror("Error", "Please enter a valid amount.")
+
+            acc_no, t_type = self.current_user["acc_no"], q_type.get()
+            self.db_call(lambda db: db.issue_qr_token(acc_no, t_type, amt),
+                         lambda token: show_token(token, t_type, amt), label="issue QR token")
+
+        def show_token(token, t_type, amt):
+            if not sim_btn.winfo_exists(): return
+            self.active_token = token
+            self.qr_display.config(image="", text="Generating...")
+            # Styled QR in brand colours; COLORS["primary"] is the dark slate used in bank theme
+            self.qr.request(token, lambda img_tk: show_image(token, img_tk), fill=COLORS["primary"], back="white")
+
+            self.qr_footer.config(text=f"Scan to {t_type} ₹{amt:,.2f}", fg=COLORS["primary"], font=("Inter", 9, "bold"))
+
+            sim_btn.config(state="normal", text=f"Scan & Confirm ₹{amt}", bg=COLORS["success"])
+
+        def show_image(token, img_tk):
+            # Skip if the portal was closed or a newer QR was requested meanwhile
+            if not self.qr_display.winfo_exists() or token != self.active_token: return
+            self.qr_display.config(image=img_tk, text="")
+            self.qr_display.image = img_tk
 
         tk.Button(left, text="Create Secure QR", bg=COLORS["primary"], fg="white", font=("Inter", 11, "bold"), 
                   command=generate_professional_qr, bd=0, cursor="hand2").pack(fill="x", ipady=12)
@@ -330,32 +805,46 @@ class BankingApp(tk.Tk):
                            state="disabled", command=lambda: self.simulate_mobile_scan(sim_btn), bd=0, cursor="hand2")
         sim_btn.pack(fill="x", pady=(15, 0), ipady=12)
         
-        tk.Label(left, text="* Single-use QR. Code expires after one scan.", fg=COLORS["danger"], bg="white", font=("Inter", 8), pady=15).pack()
+        tk.Label(left, text=f"* Single-use QR. Code expires after one scan or {QR_TOKEN_TTL // 60} minutes.", fg=COLORS["danger"], bg="white", font=("Inter", 8), pady=15).pack()
 
     def simulate_mobile_scan(self, btn):
-        data = self.db.query("SELECT * FROM qr_tokens WHERE token=? AND is_used=0", (self.active_token,))
-        if not data:
-            messagebox.showerror("QR Expired", "Aa QR Code ek var vaprai gayo che k expire thai gayo che.")
-            return
-        
-        token_info = data[0]
-        acc_no, t_type, amt = token_info[1], token_info[2], token_info[3]
-        
-        current_bal = self.db.query("SELECT balance FROM users WHERE account_number=?", (acc_no,))[0][0]
-        new_bal = (current_bal + amt) if t_type == "QR Deposit" else (current_bal - amt)
+        token = self.active_token
+        btn.config(state="disabled", text="Processing...")
+        
+        def scan(db):
+            # Token check, balance check, balance move and mark-used commit together or not at all.
+            # None: token used or expired. False: not enough funds (the token stays valid).
+            with db.transaction():
+                data = db.query("SELECT * FROM qr_tokens WHERE token=? AND is_used=0 AND expiry > datetime('now')", (token,))
+                if not data: return None
+                
+                token_info = data[0]
+                acc_no, t_type, amt = token_info[1], token_info[2], token_info[3]
+                if t_type == "QR Withdraw" and db.query("SELECT balance FROM users WHERE account_number=?", (acc_no,))[0][0] < amt:
+                    return False
+                new_bal = db.post_transaction(acc_no, t_type, amt, amt if t_type == "QR Deposit" else -amt)
+                db.execute("UPDATE qr_tokens SET is_used = 1 WHERE token = ?", (token,))
+            return t_type, amt, new_bal
+        
+        def done(result):
+            if result is False:
+                messagebox.showerror("Low Balance", "You do not have enough funds for this withdrawal.")
+                if btn.winfo_exists(): btn.config(state="normal", text="Scan & Confirm")
+                return
+            if result is None:
+                messagebox.showerror("QR Expired", "Aa QR Code ek var vaprai gayo che k expire thai gayo che.")
+                if btn.winfo_exists(): btn.config(state="disabled", text="Token Expired", bg="#94a3b8")
+                return
+            t_type, amt, new_bal = result
+            messagebox.showinfo("Transaction Success", f"Mobile Scan Completed!\n{t_type}: ₹{amt}\nNew Balance: ₹{new_bal:,.2f}")
             
-        # Update
-        self.db.execute("UPDATE users SET balance = ? WHERE account_number = ?", (new_bal, acc_no))
-        self.db.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
-                        (acc_no, t_type, amt, new_bal))
-        self.db.execute("UPDATE qr_tokens SET is_used = 1 WHERE token = ?", (self.active_token,))
+            if btn.winfo_exists():
+                self.qr_display.config(image="", text="TOKEN EXPIRED")
+                self.qr_footer.config(text="Transaction Completed", fg=COLORS["success"])
+                btn.config(state="disabled", text="Successfully Processed", bg="#94a3b8")
+            self.render_home()
         
-        messagebox.showinfo("Transaction Success", f"Mobile Scan Completed!\n{t_type}: ₹{amt}\nNew Balance: ₹{new_bal:,.2f}")
-        
-        self.qr_display.config(image="", text="TOKEN EXPIRED")
-        self.qr_footer.config(text="Transaction Completed", fg=COLORS["success"])
-        btn.config(state="disabled", text="Successfully Processed", bg="#94a3b8")
-        self.render_home()
+        self.db_call(scan, done, label="QR scan")
 
     # --- Standard Features ---
     def show_deposit(self):
@@ -363,27 +852,32 @@ class BankingApp(tk.Tk):
         if amt:
             try:
                 a = float(amt)
-                new = self.current_user["balance"] + a
-                self.db.execute("UPDATE users SET balance=? WHERE id=?", (new, self.current_user["id"]))
-                self.db.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
-                                (self.current_user["acc_no"], "Deposit", a, new))
+            except ValueError: return
+            acc_no = self.current_user["acc_no"]
+            def done(_):
                 messagebox.showinfo("Success", f"Deposited ₹{a}")
                 self.render_home()
-            except: pass
+            self.db_call(lambda db: db.post_transaction(acc_no, "Deposit", a, a), done, label="deposit")
 
     def show_withdraw(self):
         amt = self.ask_val("Cash Withdrawal", "Enter amount to withdraw:")
         if amt:
             try:
                 a = float(amt)
-                if a > self.current_user["balance"]: return messagebox.showerror("Error", "Low Balance")
-                new = self.current_user["balance"] - a
-                self.db.execute("UPDATE users SET balance=? WHERE id=?", (new, self.current_user["id"]))
-                self.db.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
-                                (self.current_user["acc_no"], "Withdrawal", a, new))
+            except ValueError: return
+            if a > self.current_user["balance"]: return messagebox.showerror("Error", "Low Balance")
+            acc_no = self.current_user["acc_no"]
+            def withdraw(db):
+                # Re-check inside the unit of work; the cached balance may be stale
+                with db.transaction():
+                    if db.query("SELECT balance FROM users WHERE account_number=?", (acc_no,))[0][0] < a:
+                        return None
+                    return db.post_transaction(acc_no, "Withdrawal", a, -a)
+            def done(new):
+                if new is None: return messagebox.showerror("Error", "Low Balance")
                 messagebox.showinfo("Success", f"Withdrawn ₹{a}")
                 self.render_home()
-            except: pass
+            self.db_call(withdraw, done, label="withdraw")
 
     def ask_val(self, title, msg):
         dialog = tk.Toplevel(self)
@@ -402,15 +896,60 @@ class BankingApp(tk.Tk):
         self.wait_window(dialog)
         return res.get()
 
-    def export_csv(self):
-        data = self.db.query("SELECT type, amount, balance_after, timestamp FROM transactions WHERE account_number=?", (self.current_user["acc_no"],))
-        path = filedialog.asksaveasfilename(defaultextension=".csv", initialfile=f"Statement_{self.current_user['acc_no']}")
-        if path:
-            with open(path, 'w', newline='') as f:
-                w = csv.writer(f)
-                w.writerow(["Type", "Amount", "Balance After", "Timestamp"])
-                w.writerows(data)
-            messagebox.showinfo("Success", "Statement exported successfully!")
+    def export_statement(self):
+        acc_no = self.current_user["acc_no"]
+        dialog = tk.Toplevel(self)
+        dialog.title("Export Statement")
+        dialog.geometry("380x360")
+        dialog.configure(bg="white")
+        
+        dates = []
+        for text in ("From date (YYYY-MM-DD, optional)", "To date (YYYY-MM-DD, optional)"):
+            tk.Label(dialog, text=text, bg="white", font=("Inter", 9, "bold")).pack(anchor="w", padx=30, pady=(15, 0))
+            e = tk.Entry(dialog, font=("Inter", 11), highlightthickness=1, highlightbackground=COLORS["light_border"], bd=0)
+            e.pack(fill="x", padx=30, pady=5, ipady=4)
+            dates.append(e)
+        
+        tk.Label(dialog, text="Format", bg="white", font=("Inter", 9, "bold")).pack(anchor="w", padx=30, pady=(10, 0))
+        fmt = ttk.Combobox(dialog, values=list(StatementExporter.FORMATS), state="readonly", font=("Inter", 10))
+        fmt.set("CSV")
+        fmt.pack(fill="x", padx=30, pady=5)
+        
+        bar = ttk.Progressbar(dialog, mode="determinate")
+        bar.pack(fill="x", padx=30, pady=(15, 5))
+        status = tk.Label(dialog, text="", bg="white", fg="#64748b", font=("Inter", 9))
+        status.pack()
+        
+        def start():
+            try:
+                date_from, date_to = [datetime.date.fromisoformat(e.get().strip()).isoformat() if e.get().strip() else None
+                                      for e in dates]
+            except ValueError:
+                return messagebox.showerror("Error", "Dates must be in YYYY-MM-DD format.", parent=dialog)
+            ext, kind, compress = StatementExporter.FORMATS[fmt.get()]
+            path = filedialog.asksaveasfilename(parent=dialog, initialfile=f"Statement_{acc_no}{ext}")
+            if not path: return
+            if not path.endswith(ext): path += ext
+            
+            job = StatementExporter(self.db.path, acc_no, path, date_from, date_to, kind, compress).start()
+            export_btn.config(state="disabled", text="Exporting...")
+            close_btn.config(text="Cancel", command=job.cancel)
+            
+            def poll():
+                if not dialog.winfo_exists(): return job.cancel()
+                bar.config(maximum=max(job.total, 1), value=job.written)
+                status.config(text=f"{job.written:,} / {job.total:,} transactions")
+                if not job.done: return self.after(100, poll)
+                dialog.destroy()
+                if job.error: messagebox.showerror("Export Failed", str(job.error))
+                elif job.cancelled: messagebox.showinfo("Cancelled", "Statement export cancelled.")
+                else: messagebox.showinfo("Success", f"Exported {job.written:,} transactions to\n{path}")
+            self.after(100, poll)
+        
+        export_btn = tk.Button(dialog, text="Export", bg=COLORS["primary"], fg="white", font=("Inter", 10, "bold"), command=start, bd=0)
+        export_btn.pack(pady=(10, 5), padx=30, fill="x", ipady=8)
+        close_btn = tk.Button(dialog, text="Close", command=dialog.destroy, bg="white", bd=0, fg=COLORS["secondary"])
+        close_btn.pack()
 
 if __name__ == "__main__":
     app = BankingApp()
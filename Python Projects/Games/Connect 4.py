@@ -3,6 +3,8 @@ import sys
 import math
 import random
 import numpy as np
+import connect4_engine as engine
+from connect4_engine import BitBoard
 
 # --- CONSTANTS & COLORS ---
 BLUE = (30, 144, 255)
@@ -49,8 +51,10 @@ def play_sound(sound):
         sound.play()
 
 # --- BOARD LOGIC ---
+# The screen keeps this (row, col) array; the AI converts it to a BitBoard once
+# per move and searches that instead (see connect4_engine.py).
 def create_board():
-    return np.zeros((ROW_COUNT, COLUMN_COUNT))
+    return np.zeros((ROW_COUNT, COLUMN_COUNT), dtype=np.int8)
 
 def drop_piece(board, row, col, piece):
     board[row][col] = piece
@@ -59,31 +63,13 @@ def is_valid_location(board, col):
     return board[ROW_COUNT-1][col] == 0
 
 def get_next_open_row(board, col):
-    for r in range(ROW_COUNT):
-        if board[r][col] == 0:
-            return r
+    # Pieces stack from row 0, so the filled count is the next free row
+    row = int(np.count_nonzero(board[:, col]))
+    if row < ROW_COUNT:
+        return row
 
 def winning_move(board, piece):
-    # Check horizontal
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT):
-            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
-                return True
-    # Check vertical
-    for c in range(COLUMN_COUNT):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
-                return True
-    # Check positively sloped diagonals
-    for c in range(COLUMN_COUNT-3):
-        for r in range(ROW_COUNT-3):
-            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
-                return True
-    # Check negatively sloped diagonals
-    for c in range(COLUMN_COUNT-3):
-        for r in range(3, ROW_COUNT):
-            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
-                return True
+    return BitBoard.from_array(board).is_win(piece)
 
 # --- AI LOGIC ---
 def evaluate_window(window, piece):
@@ -100,42 +86,12 @@ def evaluate_window(window, piece):
     return score
 
 def score_position(board, piece):
-    score = 0
-    # Center column preference
-    center_array = [int(i) for i in list(board[:, COLUMN_COUNT//2])]
-    center_count = center_array.count(piece)
-    score += center_count * 3
-
-    # Score Horizontal
-    for r in range(ROW_COUNT):
-        row_array = [int(i) for i in list(board[r,:])]
-        for c in range(COLUMN_COUNT-3):
-            window = row_array[c:c+WINDOW_LENGTH]
-            score += evaluate_window(window, piece)
-
-    # Score Vertical
-    for c in range(COLUMN_COUNT):
-        col_array = [int(i) for i in list(board[:,c])]
-        for r in range(ROW_COUNT-3):
-            window = col_array[r:r+WINDOW_LENGTH]
-            score += evaluate_window(window, piece)
-
-    # Score positive diagonal
-    for r in range(ROW_COUNT-3):
-        for c in range(COLUMN_COUNT-3):
-            window = [board[r+i][c+i] for i in range(WINDOW_LENGTH)]
-            score += evaluate_window(window, piece)
-
-    # Score negative diagonal
-    for r in range(ROW_COUNT-3):
-        for c in range(COLUMN_COUNT-3):
-            window = [board[r+3-i][c+i] for i in range(WINDOW_LENGTH)]
-            score += evaluate_window(window, piece)
-
-    return score
+    # Center column bonus plus evaluate_window() over every line of four, on bitboards
+    return BitBoard.from_array(board).score(piece)
 
 def is_terminal_node(board):
-    return winning_move(board, PLAYER_PIECE) or winning_move(board, AI_PIECE) or len(get_valid_locations(board)) == 0
+    bb = BitBoard.from_array(board)
+    return bb.is_win(PLAYER_PIECE) or bb.is_win(AI_PIECE) or bb.is_full()
 
 def get_valid_locations(board):
     valid_locations = []
@@ -145,48 +101,8 @@ def get_valid_locations(board):
     return valid_locations
 
 def minimax(board, depth, alpha, beta, maximizingPlayer):
-    valid_locations = get_valid_locations(board)
-    is_terminal = is_terminal_node(board)
-    if depth == 0 or is_terminal:
-        if is_terminal:
-            if winning_move(board, AI_PIECE):
-                return (None, 100000000000000)
-            elif winning_move(board, PLAYER_PIECE):
-                return (None, -10000000000000)
-            else: # Game is over, no more valid moves
-                return (None, 0)
-        else: # Depth is zero
-            return (None, score_position(board, AI_PIECE))
-    if maximizingPlayer:
-        value = -math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, AI_PIECE)
-            new_score = minimax(b_copy, depth-1, alpha, beta, False)[1]
-            if new_score > value:
-                value = new_score
-                column = col
-            alpha = max(alpha, value)
-            if alpha >= beta:
-                break
-        return column, value
-    else: # Minimizing player
-        value = math.inf
-        column = random.choice(valid_locations)
-        for col in valid_locations:
-            row = get_next_open_row(board, col)
-            b_copy = board.copy()
-            drop_piece(b_copy, row, col, PLAYER_PIECE)
-            new_score = minimax(b_copy, depth-1, alpha, beta, True)[1]
-            if new_score < value:
-                value = new_score
-                column = col
-            beta = min(beta, value)
-            if alpha >= beta:
-                break
-        return column, value
+    # Searches a bitboard copy with make/unmake moves; same (column, score) as before
+    return engine.minimax(BitBoard.from_array(board), depth, alpha, beta, maximizingPlayer)
 
 # --- UI DRAWING ---
 def draw_board(board):
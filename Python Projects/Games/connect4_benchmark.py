@@ -0,0 +1,224 @@
+# Connect 4 AI benchmark: original NumPy board search vs connect4_engine bitboards
+# Run with: python connect4_benchmark.py [--depths 4 6 8] [--positions 3]
+# Needs numpy only (no pygame). Checks that both searches agree on the move and
+# score of every position, then prints nodes searched and nodes/sec per depth.
+
+import sys
+import math
+import time
+import random
+import argparse
+import numpy as np
+from connect4_engine import (BitBoard, minimax, ROW_COUNT, COLUMN_COUNT,
+                             EMPTY, PLAYER_PIECE, AI_PIECE, WINDOW_LENGTH)
+
+# --- Original implementation (Connect 4.py before the bitboard engine) ---
+nodes = 0
+
+def original_drop_piece(board, row, col, piece):
+    board[row][col] = piece
+
+def original_is_valid_location(board, col):
+    return board[ROW_COUNT-1][col] == 0
+
+def original_get_next_open_row(board, col):
+    for r in range(ROW_COUNT):
+        if board[r][col] == 0:
+            return r
+
+def original_winning_move(board, piece):
+    for c in range(COLUMN_COUNT-3):
+        for r in range(ROW_COUNT):
+            if board[r][c] == piece and board[r][c+1] == piece and board[r][c+2] == piece and board[r][c+3] == piece:
+                return True
+    for c in range(COLUMN_COUNT):
+        for r in range(ROW_COUNT-3):
+            if board[r][c] == piece and board[r+1][c] == piece and board[r+2][c] == piece and board[r+3][c] == piece:
+                return True
+    for c in range(COLUMN_COUNT-3):
+        for r in range(ROW_COUNT-3):
+            if board[r][c] == piece and board[r+1][c+1] == piece and board[r+2][c+2] == piece and board[r+3][c+3] == piece:
+                return True
+    for c in range(COLUMN_COUNT-3):
+        for r in range(3, ROW_COUNT):
+            if board[r][c] == piece and board[r-1][c+1] == piece and board[r-2][c+2] == piece and board[r-3][c+3] == piece:
+                return True
+
+def original_evaluate_window(window, piece):
+    score = 0
+    opp_piece = PLAYER_PIECE if piece == AI_PIECE else AI_PIECE
+    if window.count(piece) == 4:
+        score += 100
+    elif window.count(piece) == 3 and window.count(EMPTY) == 1:
+        score += 5
+    elif window.count(piece) == 2 and window.count(EMPTY) == 2:
+        score += 2
+    if window.count(opp_piece) == 3 and window.count(EMPTY) == 1:
+        score -= 4
+    return score
+
+def original_score_position(board, piece):
+    score = 0
+    center_array = [int(i) for i in list(board[:, COLUMN_COUNT//2])]
+    score += center_array.count(piece) * 3
+    for r in range(ROW_COUNT):
+        row_array = [int(i) for i in list(board[r,:])]
+        for c in range(COLUMN_COUNT-3):
+            score += original_evaluate_window(row_array[c:c+WINDOW_LENGTH], piece)
+    for c in range(COLUMN_COUNT):
+        col_array = [int(i) for i in list(board[:,c])]
+        for r in range(ROW_COUNT-3):
+            score += original_evaluate_window(col_array[r:r+WINDOW_LENGTH], piece)
+    for r in range(ROW_COUNT-3):
+        for c in range(COLUMN_COUNT-3):
+            score += original_evaluate_window([board[r+i][c+i] for i in range(WINDOW_LENGTH)], piece)
+    for r in range(ROW_COUNT-3):
+        for c in range(COLUMN_COUNT-3):
+            score += original_evaluate_window([board[r+3-i][c+i] for i in range(WINDOW_LENGTH)], piece)
+    return score
+
+def original_get_valid_locations(board):
+    return [col for col in range(COLUMN_COUNT) if original_is_valid_location(board, col)]
+
+def original_is_terminal_node(board):
+    return (original_winning_move(board, PLAYER_PIECE) or original_winning_move(board, AI_PIECE)
+            or len(original_get_valid_locations(board)) == 0)
+
+def original_minimax(board, depth, alpha, beta, maximizingPlayer):
+    global nodes
+    nodes += 1
+    valid_locations = original_get_valid_locations(board)
+    is_terminal = original_is_terminal_node(board)
+    if depth == 0 or is_terminal:
+        if is_terminal:
+            if original_winning_move(board, AI_PIECE):
+                return (None, 100000000000000)
+            elif original_winning_move(board, PLAYER_PIECE):
+                return (None, -10000000000000)
+            else:
+                return (None, 0)
+        else:
+            return (None, original_score_position(board, AI_PIECE))
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    value = -math.inf if maximizingPlayer else math.inf
+    column = random.choice(valid_locations)
+    for col in valid_locations:
+        row = original_get_next_open_row(board, col)
+        b_copy = board.copy()
+        original_drop_piece(b_copy, row, col, piece)
+        new_score = original_minimax(b_copy, depth-1, alpha, beta, not maximizingPlayer)[1]
+        if maximizingPlayer:
+            if new_score > value:
+                value, column = new_score, col
+            alpha = max(alpha, value)
+        else:
+            if new_score < value:
+                value, column = new_score, col
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return column, value
+
+# --- Bitboard search, with a node counter on play() ---
+class CountingBitBoard(BitBoard):
+    __slots__ = ()
+
+    def play(self, col, piece):
+        global nodes
+        nodes += 1
+        BitBoard.play(self, col, piece)
+
+def sample_positions(count, seed=7):
+    """The empty board plus `count` random mid-game positions nobody has won yet."""
+    rng = random.Random(seed)
+    positions = [np.zeros((ROW_COUNT, COLUMN_COUNT))]
+    while len(positions) < count + 1:
+        board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+        for move in range(rng.randint(6, 16)):
+            col = rng.choice(original_get_valid_locations(board))
+            original_drop_piece(board, original_get_next_open_row(board, col), col, PLAYER_PIECE if move % 2 == 0 else AI_PIECE)
+        if not original_is_terminal_node(board):
+            positions.append(board)
+    return positions
+
+def run(search, board, depth):
+    """(result, seconds, nodes) of one seeded search."""
+    global nodes
+    random.seed(depth)
+    nodes = 0
+    start = time.perf_counter()
+    result = search(board, depth)
+    return result, time.perf_counter() - start, nodes
+
+def original(board, depth):
+    return original_minimax(board, depth, -math.inf, math.inf, True)
+
+def bitboard(board, depth):
+    return minimax(BitBoard.from_array(board), depth, -math.inf, math.inf, True)
+
+def bitboard_counted(board, depth):
+    global nodes
+    nodes += 1   # the root; every other node is one play()
+    return minimax(CountingBitBoard.from_array(board), depth, -math.inf, math.inf, True)
+
+def check_helpers(positions, trials=2000, seed=11):
+    """winning_move and score_position agree with the bitboard versions on random boards."""
+    rng = random.Random(seed)
+    boards = list(positions)
+    for _ in range(trials):
+        board = np.zeros((ROW_COUNT, COLUMN_COUNT))
+        for move in range(rng.randint(0, ROW_COUNT * COLUMN_COUNT)):
+            col = rng.choice(original_get_valid_locations(board))
+            original_drop_piece(board, original_get_next_open_row(board, col), col, rng.choice((PLAYER_PIECE, AI_PIECE)))
+        boards.append(board)
+    mismatches = 0
+    for board in boards:
+        bb = BitBoard.from_array(board)
+        for piece in (PLAYER_PIECE, AI_PIECE):
+            mismatches += bool(original_winning_move(board, piece)) != bb.is_win(piece)
+            mismatches += original_score_position(board, piece) != bb.score(piece)
+        mismatches += original_is_terminal_node(board) != (bb.is_win(PLAYER_PIECE) or bb.is_win(AI_PIECE) or bb.is_full())
+    return len(boards), mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="Connect 4 minimax benchmark")
+    parser.add_argument("--depths", type=int, nargs="+", default=[4, 6, 8])
+    parser.add_argument("--positions", type=int, default=3, help="random mid-game positions besides the empty board")
+    parser.add_argument("--original-max-depth", type=int, default=6,
+                        help="deepest search run on the original board (depth 8 takes minutes)")
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions)
+    boards, mismatches = check_helpers(positions)
+    print(f"{'OK ' if not mismatches else 'BAD'} winning_move/score_position/is_terminal_node on {boards} boards: "
+          f"{mismatches} mismatches\n")
+    failures = bool(mismatches)
+
+    print(f"{'depth':>5} {'engine':<10} {'nodes':>10} {'seconds':>9} {'nodes/sec':>11} {'speedup':>8}")
+    for depth in args.depths:
+        rows = {}
+        for name, search, counted in (("original", original, None), ("bitboard", bitboard, bitboard_counted)):
+            if name == "original" and depth > args.original_max_depth:
+                continue
+            results, searched, seconds = [], 0, 0.0
+            for board in positions:
+                result, elapsed, count = run(search, board, depth)
+                if counted:   # counted separately so the timed run has no counter overhead
+                    count = run(counted, board, depth)[2]
+                results.append(result)
+                searched += count
+                seconds += elapsed
+            rows[name] = (results, searched, seconds)
+        for name, (results, searched, seconds) in rows.items():
+            rate = searched / seconds
+            speedup = f"{rate / (rows['original'][1] / rows['original'][2]):7.1f}x" if "original" in rows else "-"
+            print(f"{depth:>5} {name:<10} {searched:>10} {seconds:>9.3f} {rate:>11.0f} {speedup:>8}")
+        if "original" in rows:
+            same = rows["original"][0] == rows["bitboard"][0]
+            failures |= not same
+            print(f"{'OK ' if same else 'BAD'}   same (column, score) on all {len(positions)} positions")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+# Bitboard engine for Connect 4.py
+# Pure Python (no pygame), so the AI can be used and benchmarked headless.
+#
+# Each player's pieces are one int. Column c uses bits c*7 .. c*7+5, bottom row
+# first; the 7th bit of every column stays empty so shifted lines never wrap
+# into the next column:
+#
+#    5 12 19 26 33 40 47
+#    4 11 18 25 32 39 46
+#    3 10 17 24 31 38 45
+#    2  9 16 23 30 37 44
+#    1  8 15 22 29 36 43
+#    0  7 14 21 28 35 42
+
+import math
+import random
+
+ROW_COUNT = 6
+COLUMN_COUNT = 7
+COLUMN_BITS = ROW_COUNT + 1
+
+EMPTY = 0
+PLAYER_PIECE = 1
+AI_PIECE = 2
+WINDOW_LENGTH = 4
+
+WIN_SCORE = 100000000000000
+LOSS_SCORE = -10000000000000
+
+# vertical, horizontal, diagonal /, diagonal \
+DIRECTIONS = (1, COLUMN_BITS, COLUMN_BITS + 1, COLUMN_BITS - 1)
+
+def bit(row, col):
+    return 1 << (col * COLUMN_BITS + row)
+
+def _windows():
+    """Masks of every line of four on the board (69 of them)."""
+    windows = []
+    for r in range(ROW_COUNT):
+        for c in range(COLUMN_COUNT):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                cells = [(r + i * dr, c + i * dc) for i in range(WINDOW_LENGTH)]
+                if all(0 <= rr < ROW_COUNT and 0 <= cc < COLUMN_COUNT for rr, cc in cells):
+                    windows.append(sum(bit(rr, cc) for rr, cc in cells))
+    return tuple(windows)
+
+WINDOWS = _windows()
+CENTER_MASK = sum(bit(r, COLUMN_COUNT // 2) for r in range(ROW_COUNT))
+COLUMN_TOPS = tuple(c * COLUMN_BITS + ROW_COUNT for c in range(COLUMN_COUNT))
+
+# Score of one window by (own pieces, opponent pieces), matching evaluate_window()
+WINDOW_SCORE = [[0] * (WINDOW_LENGTH + 1) for _ in range(WINDOW_LENGTH + 1)]
+WINDOW_SCORE[4][0] = 100
+WINDOW_SCORE[3][0] = 5
+WINDOW_SCORE[2][0] = 2
+WINDOW_SCORE[0][3] = -4
+
+class BitBoard:
+    """One position: a bitboard per piece plus the next free bit of each column.
+
+    play() and undo() change the position in place, so a search walks a single
+    board instead of copying it at every node.
+    """
+
+    __slots__ = ("pieces", "heights")
+
+    def __init__(self):
+        self.pieces = [0, 0, 0]   # indexed by piece; slot 0 is unused
+        self.heights = [c * COLUMN_BITS for c in range(COLUMN_COUNT)]
+
+    @classmethod
+    def from_array(cls, board):
+        """Builds a BitBoard from the game's (row, col) array, row 0 at the bottom."""
+        bb = cls()
+        for r in range(ROW_COUNT):
+            for c in range(COLUMN_COUNT):
+                piece = int(board[r][c])
+                if piece:
+                    bb.pieces[piece] |= bit(r, c)
+                    bb.heights[c] += 1
+        return bb
+
+    def can_play(self, col):
+        return self.heights[col] < COLUMN_TOPS[col]
+
+    def valid_moves(self):
+        return [c for c in range(COLUMN_COUNT) if self.heights[c] < COLUMN_TOPS[c]]
+
+    def next_row(self, col):
+        return self.heights[col] - col * COLUMN_BITS
+
+    def play(self, col, piece):
+        self.pieces[piece] |= 1 << self.heights[col]
+        self.heights[col] += 1
+
+    def undo(self, col, piece):
+        self.heights[col] -= 1
+        self.pieces[piece] ^= 1 << self.heights[col]
+
+    def is_win(self, piece):
+        b = self.pieces[piece]
+        for shift in DIRECTIONS:
+            pairs = b & (b >> shift)
+            if pairs & (pairs >> 2 * shift):
+                return True
+        return False
+
+    def is_full(self):
+        return self.heights == list(COLUMN_TOPS)
+
+    def score(self, piece):
+        """Same heuristic as score_position(): centre column plus every window of four."""
+        mine, theirs = self.pieces[piece], self.pieces[AI_PIECE if piece == PLAYER_PIECE else PLAYER_PIECE]
+        score = (mine & CENTER_MASK).bit_count() * 3
+        for window in WINDOWS:
+            score += WINDOW_SCORE[(mine & window).bit_count()][(theirs & window).bit_count()]
+        return score
+
+def minimax(bb, depth, alpha, beta, maximizingPlayer):
+    """Alpha-beta search on a BitBoard; returns (column, score) like the array version.
+
+    Columns are tried left to right and ties are broken with random.choice
+    exactly as before, so both versions pick the same move for the same seed.
+    """
+    valid_locations = bb.valid_moves()
+    ai_won, player_won = bb.is_win(AI_PIECE), bb.is_win(PLAYER_PIECE)
+    if ai_won or player_won or not valid_locations:
+        return (None, WIN_SCORE if ai_won else LOSS_SCORE if player_won else 0)
+    if depth == 0:
+        return (None, bb.score(AI_PIECE))
+
+    piece = AI_PIECE if maximizingPlayer else PLAYER_PIECE
+    value = -math.inf if maximizingPlayer else math.inf
+    column = random.choice(valid_locations)
+    for col in valid_locations:
+        bb.play(col, piece)
+        new_score = minimax(bb, depth - 1, alpha, beta, not maximizingPlayer)[1]
+        bb.undo(col, piece)
+        if maximizingPlayer:
+            if new_score > value:
+                value, column = new_score, col
+            alpha = max(alpha, value)
+        else:
+            if new_score < value:
+                value, column = new_score, col
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+    return column, value
@@ -1,9 +1,9 @@
 # Leaning Steamlit And Qrcode Liybrery 
 
 import streamlit as st
-import qrcode
-from PIL import Image
 import io
+import tempfile
+from qr_engine import BATCH_FORMATS, QRCache, read_payloads, batch_generate
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -36,27 +36,55 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-def generate_qr(text, fill_color, back_color, error_level):
-    """Generates a QR code image based on parameters."""
-    # Map error correction levels
-    ecc_map = {
-        "L (Low)": qrcode.constants.ERROR_CORRECT_L,
-        "M (Medium)": qrcode.constants.ERROR_CORRECT_M,
-        "Q (Quartile)": qrcode.constants.ERROR_CORRECT_Q,
-        "H (High)": qrcode.constants.ERROR_CORRECT_H,
-    }
-    
-    qr = qrcode.QRCode(
-        version=1,
-        error_correction=ecc_map[error_level],
-        box_size=10,
-        border=4,
-    )
-    qr.add_data(text if text else " ")
-    qr.make(fit=True)
-
-    img = qr.make_image(fill_color=fill_color, back_color=back_color)
-    return img
+# Export format -> (file extension, MIME type)
+EXPORT_FORMATS = {
+    "PNG": ("png", "image/png"),
+    "JPEG": ("jpeg", "image/jpeg"),
+    "SVG": ("svg", "image/svg+xml"),
+    "PDF": ("pdf", "application/pdf"),
+    "NPY": ("npy", "application/octet-stream"),
+}
+
+@st.cache_resource
+def qr_cache():
+    """One QRCache shared by every rerun and session of this server."""
+    return QRCache()
+
+def cache_sidebar(cache):
+    st.sidebar.subheader("⚡ Render Cache")
+    for label, lru in (("QR Matrices", cache.matrices), ("Encoded Files", cache.files)):
+        st.sidebar.metric(f"{label} Hit Rate", f"{lru.hit_rate:.0%}",
+                          f"{lru.hits} hits / {lru.misses} misses", delta_color="off")
+        st.sidebar.caption(f"{len(lru)}/{lru.max_entries} entries, {lru.evictions} evicted")
+
+def batch_panel(fg_color, bg_color, error_level):
+    """Badge printing: one uploaded file of payloads in, one ZIP of codes out."""
+    st.subheader("📦 Batch Mode")
+    upload = st.file_uploader("CSV or text file of payloads (one per line)", type=["csv", "txt"])
+    b1, b2 = st.columns(2)
+    with b1:
+        batch_format = st.selectbox("Batch Format", BATCH_FORMATS)
+    with b2:
+        column = st.text_input("CSV Column (name or index)", value="0", help="The first CSV row is the header and is skipped")
+
+    if upload and st.button("Generate ZIP"):
+        lines = io.TextIOWrapper(upload, encoding="utf-8", newline="")
+        column = column if upload.name.lower().endswith(".csv") else None
+        total = sum(1 for _ in read_payloads(lines, column))
+        lines.seek(0)
+
+        bar, stats = st.progress(0.0), st.empty()
+        def progress(done, seconds):
+            bar.progress(min(1.0, done / max(total, 1)))
+            stats.metric("Throughput", f"{done / seconds:,.0f} codes/sec", f"{done:,} / {total:,} codes")
+
+        # The archive is spooled to disk; only the finished ZIP is read back for download
+        with tempfile.TemporaryFile() as tmp:
+            codes, seconds = batch_generate(read_payloads(lines, column), tmp, batch_format,
+                                            fg_color, bg_color, error_level, progress=progress)
+            tmp.seek(0)
+            st.success(f"Generated {codes:,} codes in {seconds:.2f}s ({codes / max(seconds, 1e-9):,.0f} codes/sec)")
+            st.download_button("Download ZIP", data=tmp.read(), file_name="qr_codes.zip", mime="application/zip")
 
 def main():
     st.title("QR 🎯 Studio")
@@ -88,32 +116,35 @@ def main():
 
         with c2:
             bg_color = st.color_picker("Background Color", "#FFFFFF")
-            img_format = st.selectbox("Export Format", ["PNG", "JPEG"])
+            img_format = st.selectbox("Export Format", list(EXPORT_FORMATS),
+                                      help="SVG/PDF are vector (best for print); NPY is the bit-packed module matrix.")
 
     with col2:
         st.subheader("🖼️ Preview")
         
-        # Generate the QR Code
-        qr_img = generate_qr(data, fg_color, bg_color, error_level)
-        
-        # Convert PIL image to bytes for display and download
-        buf = io.BytesIO()
-        qr_img.save(buf, format=img_format)
-        byte_im = buf.getvalue()
+        # Cached: reruns that change nothing reuse the bytes, and colour/format
+        # changes reuse the QR matrix. The preview is always PNG.
+        preview = qr_cache().encoded(data, fg_color, bg_color, error_level, "PNG")
+        export = qr_cache().encoded(data, fg_color, bg_color, error_level, img_format)
 
         # Display the image - Updated to use width='stretch' per your terminal warning
-        st.image(byte_im, width='stretch')
-        
+        st.image(preview, width='stretch')
+
         # Download Button
+        ext, mime = EXPORT_FORMATS[img_format]
         st.download_button(
             label=f"Download {img_format}",
-            data=byte_im,
-            file_name=f"qr_code.{img_format.lower()}",
-            mime=f"image/{img_format.lower()}"
+            data=export,
+            file_name=f"qr_code.{ext}",
+            mime=mime
         )
         
         st.info("💡 **Pro Tip**: Use 'High' error correction if you plan to print the QR code on uneven surfaces.")
 
+    st.divider()
+    batch_panel(fg_color, bg_color, error_level)
+    cache_sidebar(qr_cache())
+
 if __name__ == "__main__":
     main()
                                                                                                                                                      # Created By Manthan Vinzuda....
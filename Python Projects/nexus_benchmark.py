@@ -0,0 +1,141 @@
+# Benchmarks for Nexus Pro ("Banking System.py").
+# Run with: python nexus_benchmark.py
+# Uses a throwaway database in a temp folder; no window is opened.
+
+import os
+import sys
+import time
+import tempfile
+import importlib.util
+
+def load_nexus():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Banking System.py")
+    spec = importlib.util.spec_from_file_location("nexus", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+nexus = load_nexus()
+
+def report(label, ops, elapsed, commits):
+    print(f"{label:<36} {ops / elapsed:>10,.0f} ops/sec {commits / ops:>6.1f} commits (fsyncs)/op")
+
+def count_commits(db):
+    """Every COMMIT syncs the WAL once under the default synchronous=FULL."""
+    seen = [0]
+    db.conn.set_trace_callback(lambda sql: seen.__setitem__(0, seen[0] + (sql.strip().upper() == "COMMIT")))
+    return seen
+
+def issue_tokens(db, acc_no, prefix, count):
+    tokens = [f"{prefix}-{i}" for i in range(count)]
+    with db.transaction():
+        for token in tokens:
+            db.execute("INSERT INTO qr_tokens (token, account_number, type, amount) VALUES (?,?,?,?)",
+                       (token, acc_no, "QR Deposit", 10.0))
+    return tokens
+
+def scan_per_statement(db, token):
+    """The old simulate_mobile_scan: three autocommitted statements."""
+    acc_no, t_type, amt = db.query("SELECT account_number, type, amount FROM qr_tokens WHERE token=? AND is_used=0", (token,))[0]
+    new_bal = db.query("SELECT balance FROM users WHERE account_number=?", (acc_no,))[0][0] + amt
+    db.execute("UPDATE users SET balance = ? WHERE account_number = ?", (new_bal, acc_no))
+    db.execute("INSERT INTO transactions (account_number, type, amount, balance_after) VALUES (?,?,?,?)",
+               (acc_no, t_type, amt, new_bal))
+    db.execute("UPDATE qr_tokens SET is_used = 1 WHERE token = ?", (token,))
+
+def scan_unit_of_work(db, token):
+    with db.transaction():
+        acc_no, t_type, amt = db.query("SELECT account_number, type, amount FROM qr_tokens WHERE token=? AND is_used=0", (token,))[0]
+        db.post_transaction(acc_no, t_type, amt, amt)
+        db.execute("UPDATE qr_tokens SET is_used = 1 WHERE token = ?", (token,))
+
+def bench_commits(db, ops=300):
+    print("\n== QR scan commits ==")
+    acc_no = db.accounts.next()
+    db.execute("INSERT INTO users (full_name, email, password_hash, account_number, balance) VALUES (?,?,?,?,?)",
+               ("Bench User", "bench@nexus.local", b"x", acc_no, 1000.0))
+    for label, scan in (("per-statement commits (before)", scan_per_statement),
+                        ("transaction() unit of work (after)", scan_unit_of_work)):
+        tokens = issue_tokens(db, acc_no, scan.__name__, ops)
+        commits = count_commits(db)
+        start = time.perf_counter()
+        for token in tokens:
+            scan(db, token)
+        elapsed = time.perf_counter() - start
+        db.conn.set_trace_callback(None)
+        report(label, ops, elapsed, commits[0])
+
+def bench_qr_reaper(db, tokens=30000):
+    """Reaps a backlog of used and expired-unused tokens; live unused ones must survive.
+
+    The three kinds are disjoint thirds of the backlog, so both DELETEs in
+    reap_qr_tokens() have rows to remove.
+    """
+    print("\n== QR token reaper ==")
+    for label, sql in (("used tokens", "SELECT rowid FROM qr_tokens WHERE is_used = 1 LIMIT 1"),
+                       ("expired tokens", "SELECT rowid FROM qr_tokens WHERE is_used = 0 AND expiry <= datetime('now') LIMIT 1")):
+        plan = " | ".join(row[3] for row in db.query("EXPLAIN QUERY PLAN " + sql))
+        print(f"{'OK ' if 'USING INDEX idx_qr_' in plan else 'BAD'} {label:<16} {plan}")
+
+    with db.transaction():
+        issued = [db.issue_qr_token("NEX000000", "QR Deposit", 10.0, ttl=-60 if i % 3 == 0 else nexus.QR_TOKEN_TTL)
+                  for i in range(tokens)]
+        for token in issued[1::3]:
+            db.execute("UPDATE qr_tokens SET is_used = 1 WHERE token = ?", (token,))
+    expired_sql = "SELECT COUNT(*) FROM qr_tokens WHERE is_used = 0 AND expiry <= datetime('now')"
+    live_sql = "SELECT COUNT(*) FROM qr_tokens WHERE is_used = 0 AND expiry > datetime('now')"
+    expired, live = db.query(expired_sql)[0][0], db.query(live_sql)[0][0]
+
+    deleted, batches = 0, 0
+    start = time.perf_counter()
+    while True:
+        n = db.reap_qr_tokens()
+        deleted, batches = deleted + n, batches + 1
+        if n < nexus.QR_REAP_BATCH: break
+    elapsed = time.perf_counter() - start
+    left = db.query("SELECT COUNT(*) FROM qr_tokens")[0][0]
+    expired_left, live_left = db.query(expired_sql)[0][0], db.query(live_sql)[0][0]
+    ok = expired > 0 and expired_left == 0 and live_left == live == left
+    print(f"{'reaped ' + str(batches) + ' batches':<36} {deleted / elapsed:>10,.0f} rows/sec")
+    print(f"{'OK ' if ok else 'BAD'} {deleted:,} deleted ({expired:,} expired unused), {left:,} live tokens kept")
+    return 0 if ok else 1
+
+def bench_qr_render(samples=200, size=240):
+    """Per-QR latency: old render + LANCZOS resize vs direct-size render."""
+    print("\n== QR rendering ==")
+    payloads = [nexus.secrets.token_urlsafe(nexus.QR_TOKEN_BYTES) for _ in range(samples)]
+    fill = nexus.COLORS["primary"]
+
+    def old_render(payload):
+        qr = nexus.qrcode.QRCode(version=1, box_size=10, border=1)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        return qr.make_image(fill_color=fill, back_color="white").resize((size, size), nexus.Image.Resampling.LANCZOS)
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        for payload in payloads:
+            fn(payload)
+        print(f"{label:<36} {(time.perf_counter() - start) / samples * 1000:>8.3f} ms/QR")
+
+    timed("box_size=10 + LANCZOS resize (before)", old_render)
+    timed("render_image at target size (after)",
+          lambda p: nexus.QRRenderer.render_image(p, size, fill, "white"))
+
+    sizes = {nexus.QRRenderer.render_image(p, size, fill, "white").size for p in payloads}
+    print(f"{'OK ' if sizes == {(size, size)} else 'BAD'} every image is {size}x{size}")
+    return 0 if sizes == {(size, size)} else 1
+
+def main():
+    workdir = tempfile.mkdtemp(prefix="nexus_bench_")
+    # Keep the default admin cheap to hash
+    nexus.BCRYPT_ROUNDS = 4
+    db = nexus.Database(os.path.join(workdir, "bench.db"))
+    bench_commits(db)
+    failures = bench_qr_reaper(db)
+    failures += bench_qr_render()
+    db.conn.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
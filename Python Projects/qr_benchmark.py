@@ -0,0 +1,56 @@
+# Output-format benchmark for qr_engine / QR Gen.py
+# Run with: python qr_benchmark.py [samples]
+# Compares the original qrcode -> PIL -> PNG path with the matrix-based PNG,
+# JPEG, SVG, PDF and bit-packed NPY outputs (time per code and bytes per code).
+
+import io
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+import qrcode
+from qr_engine import ECC_LEVELS, RENDERERS, qr_matrix, unpack_matrix
+
+def original_png(payload, fill_color, back_color, error_level):
+    """generate_qr() + img.save() as QR Gen.py did before qr_engine."""
+    qr = qrcode.QRCode(version=1, error_correction=ECC_LEVELS[error_level], box_size=10, border=4)
+    qr.add_data(payload)
+    qr.make(fit=True)
+    buf = io.BytesIO()
+    qr.make_image(fill_color=fill_color, back_color=back_color).save(buf, format="PNG")
+    return buf.getvalue()
+
+def main(samples=200):
+    payloads = [f"https://example.com/badge/{i:06d}?event=expo" for i in range(samples)]
+    fill, back, ecc = "#0f172a", "#FFFFFF", "M (Medium)"
+
+    start = time.perf_counter()
+    matrices = [qr_matrix(p, ecc) for p in payloads]
+    encode_ms = (time.perf_counter() - start) / samples * 1000
+    print(f"QR encode (Reed-Solomon + mask), shared by every format: {encode_ms:.2f} ms/code\n")
+
+    print(f"{'Output':<28} {'ms/code':>9} {'bytes/code':>11} {'vs PNG size':>12}")
+    start = time.perf_counter()
+    sizes = [len(original_png(p, fill, back, ecc)) for p in payloads]
+    baseline = sum(sizes) / samples
+    print(f"{'original PIL PNG (+encode)':<28} {(time.perf_counter() - start) / samples * 1000:>9.3f} {baseline:>11,.0f} {'1.00x':>12}")
+
+    for fmt, render in RENDERERS.items():
+        start = time.perf_counter()
+        sizes = [len(render(m, 10, fill, back)) for m in matrices]
+        elapsed = (time.perf_counter() - start) / samples * 1000
+        avg = sum(sizes) / samples
+        print(f"{fmt + ' from matrix':<28} {elapsed:>9.3f} {avg:>11,.0f} {avg / baseline:>11.2f}x")
+
+    # Zero-copy check: map a packed matrix straight from disk and unpack it
+    path = os.path.join(tempfile.mkdtemp(prefix="qr_bench_"), "qr.npy")
+    with open(path, "wb") as f:
+        f.write(RENDERERS["NPY"](matrices[0]))
+    mapped = np.load(path, mmap_mode="r")
+    ok = isinstance(mapped, np.memmap) and np.array_equal(unpack_matrix(mapped), matrices[0])
+    print(f"\n{'OK ' if ok else 'BAD'} NPY memory-maps without a copy and unpacks to the original {matrices[0].shape} matrix")
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main(*map(int, sys.argv[1:])))
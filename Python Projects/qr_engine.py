@@ -0,0 +1,294 @@
+# QR rendering + batch engine for QR Gen.py
+# Lives in its own importable module so process-pool workers can be pickled
+# (Streamlit runs "QR Gen.py" through exec, which multiprocessing cannot import).
+#
+# CLI:  python qr_engine.py badges.csv -c url -o badges.zip --format SVG
+
+import io
+import os
+import sys
+import csv
+import time
+import zipfile
+import argparse
+import threading
+from collections import deque, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import qrcode
+from PIL import Image, ImageColor
+
+# Map error correction levels
+ECC_LEVELS = {
+    "L (Low)": qrcode.constants.ERROR_CORRECT_L,
+    "M (Medium)": qrcode.constants.ERROR_CORRECT_M,
+    "Q (Quartile)": qrcode.constants.ERROR_CORRECT_Q,
+    "H (High)": qrcode.constants.ERROR_CORRECT_H,
+}
+
+BATCH_FORMATS = ("PNG", "SVG", "PDF", "NPY")
+BATCH_CHUNK = 64        # payloads per worker task, amortises process round-trips
+BATCH_IN_FLIGHT = 4     # chunks queued per worker; bounds memory however big the input
+
+# --- Batch Mode ---
+def read_payloads(lines, column=None):
+    """Yields payloads from text lines: one per line, or one CSV column when `column` is set.
+
+    `column` is a header name or a 0-based index; the first CSV row is the header
+    and is never encoded, and blank payloads are skipped.
+    Works on any iterable of lines, so files are streamed, never loaded whole.
+    """
+    if column is None:
+        for line in lines:
+            line = line.strip()
+            if line: yield line
+        return
+    rows = csv.reader(lines)
+    header = next(rows, [])
+    if isinstance(column, str) and not column.isdigit():
+        if column not in header:
+            raise ValueError(f"Column '{column}' not in CSV header: {header}")
+        index = header.index(column)
+    else:
+        index = int(column)
+    for row in rows:
+        if len(row) > index and row[index].strip():
+            yield row[index].strip()
+
+# --- Rendering ---
+# Everything renders from the module matrix (True = dark, quiet zone included)
+# instead of qrcode's image factories, which draw one rectangle per module.
+
+def qr_matrix(payload, error_level="M (Medium)", border=4):
+    qr = qrcode.QRCode(error_correction=ECC_LEVELS[error_level], border=border)
+    qr.add_data(payload if payload else " ")
+    qr.make(fit=True)
+    return np.array(qr.get_matrix(), dtype=bool)
+
+def matrix_to_image(matrix, box_size=10, fill_color="#000000", back_color="#FFFFFF"):
+    """Two-colour palette image, scaled up with NEAREST so module edges stay sharp."""
+    img = Image.fromarray(matrix.astype(np.uint8), "P")
+    img.putpalette(ImageColor.getrgb(back_color) + ImageColor.getrgb(fill_color))
+    return img.resize((img.width * box_size, img.height * box_size), Image.Resampling.NEAREST)
+
+def matrix_to_png(matrix, box_size=10, fill_color="#000000", back_color="#FFFFFF"):
+    buf = io.BytesIO()
+    matrix_to_image(matrix, box_size, fill_color, back_color).save(buf, format="PNG", bits=1)
+    return buf.getvalue()
+
+def matrix_to_jpeg(matrix, box_size=10, fill_color="#000000", back_color="#FFFFFF"):
+    buf = io.BytesIO()
+    matrix_to_image(matrix, box_size, fill_color, back_color).convert("RGB").save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+def matrix_runs(matrix):
+    """Yields (y, x, width) for every horizontal run of dark modules."""
+    edges = np.diff(np.pad(matrix.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    for y, row in enumerate(edges):
+        starts, ends = np.flatnonzero(row == 1).tolist(), np.flatnonzero(row == -1).tolist()
+        for x0, x1 in zip(starts, ends):
+            yield y, x0, x1 - x0
+
+def matrix_to_svg(matrix, box_size=10, fill_color="#000000", back_color="#FFFFFF"):
+    """One <path> with each horizontal run of dark modules merged into a single rectangle."""
+    h, w = matrix.shape
+    runs = "".join(f"M{x},{y}h{n}v1h-{n}z" for y, x, n in matrix_runs(matrix))
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{w * box_size}" height="{h * box_size}" '
+            f'viewBox="0 0 {w} {h}" shape-rendering="crispEdges">'
+            f'<rect width="{w}" height="{h}" fill="{back_color}"/>'
+            f'<path fill="{fill_color}" d="{runs}"/></svg>').encode("utf-8")
+
+def _pdf_rgb(color):
+    return " ".join(f"{c / 255:.3f}" for c in ImageColor.getrgb(color)[:3])
+
+def matrix_to_pdf(matrix, box_size=10, fill_color="#000000", back_color="#FFFFFF"):
+    """Single-page vector PDF with the same runs as the SVG, at the SVG's physical size."""
+    h, w = matrix.shape
+    scale = box_size * 0.75   # CSS px -> PDF points
+    ops = [f"{scale:g} 0 0 {-scale:g} 0 {h * scale:g} cm",   # module units, y pointing down
+           f"{_pdf_rgb(back_color)} rg 0 0 {w} {h} re f",
+           f"{_pdf_rgb(fill_color)} rg"]
+    ops += [f"{x} {y} {n} 1 re" for y, x, n in matrix_runs(matrix)]
+    ops.append("f")
+    content = "\n".join(ops).encode("ascii")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {w * scale:g} {h * scale:g}] /Contents 4 0 R >>".encode("ascii"),
+        b"<< /Length %d >>\nstream\n%s\nendstream" % (len(content), content),
+    ]
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+def pack_matrix(matrix):
+    """Bit-packed module matrix: one row per module row, 8 modules per byte (MSB first).
+
+    The matrix is square, so the module count is packed.shape[0]; that is all
+    unpack_matrix needs. Padding bits at the end of each row are zero.
+    """
+    return np.packbits(matrix, axis=1)
+
+def unpack_matrix(packed):
+    return np.unpackbits(packed, axis=1, count=packed.shape[0]).astype(bool)
+
+def matrix_to_npy(matrix, box_size=None, fill_color=None, back_color=None):
+    """Packed matrix as a .npy file; np.load(path, mmap_mode="r") maps it without copying."""
+    buf = io.BytesIO()
+    np.save(buf, pack_matrix(matrix), allow_pickle=False)
+    return buf.getvalue()
+
+RENDERERS = {"PNG": matrix_to_png, "JPEG": matrix_to_jpeg, "SVG": matrix_to_svg,
+             "PDF": matrix_to_pdf, "NPY": matrix_to_npy}
+
+# --- Caching ---
+class LRUCache:
+    """Bounded mapping with least-recently-used eviction and hit/miss counters.
+
+    Thread-safe, since Streamlit serves each browser session on its own thread.
+    The factory runs outside the lock, so a slow miss does not block hits.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.hits = self.misses = self.evictions = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, factory):
+        with self._lock:
+            if key in self._items:
+                self.hits += 1
+                self._items.move_to_end(key)
+                return self._items[key]
+            self.misses += 1
+        value = factory()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def __len__(self):
+        return len(self._items)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+class QRCache:
+    """Two-level cache for the studio preview.
+
+    Module matrices are keyed on (text, error level) only, so changing a
+    colour or the export format skips the Reed-Solomon encode and mask
+    search. Encoded files are keyed on everything that changes the bytes.
+    """
+
+    def __init__(self, max_matrices=256, max_files=128, box_size=10, border=4):
+        self.box_size = box_size
+        self.border = border
+        self.matrices = LRUCache(max_matrices)
+        self.files = LRUCache(max_files)
+
+    def matrix(self, text, error_level):
+        return self.matrices.get_or_create((text, error_level),
+                                           lambda: qr_matrix(text, error_level, self.border))
+
+    def encoded(self, text, fill_color, back_color, error_level, fmt):
+        render = RENDERERS[fmt]
+        return self.files.get_or_create(
+            (text, fill_color, back_color, error_level, fmt),
+            lambda: render(self.matrix(text, error_level), self.box_size, fill_color, back_color))
+
+def render_batch(chunk, fmt, fill_color, back_color, error_level, box_size, border):
+    """Pool worker: renders [(index, payload), ...] into [(index, file bytes), ...]."""
+    render = RENDERERS[fmt]
+    return [(index, render(qr_matrix(payload, error_level, border), box_size, fill_color, back_color))
+            for index, payload in chunk]
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def batch_generate(payloads, out, fmt="PNG", fill_color="#000000", back_color="#FFFFFF",
+                   error_level="M (Medium)", box_size=10, border=4, workers=None, progress=None):
+    """Renders every payload on a process pool and streams the files into a ZIP.
+
+    `out` is a path or a writable binary file. Only BATCH_IN_FLIGHT chunks per
+    worker are queued at a time, and results are written in input order as
+    soon as they arrive, so memory stays flat for any input size.
+    `progress(done, seconds)` is called after each chunk. Returns (codes, seconds).
+    """
+    fmt = fmt.upper()
+    if fmt not in BATCH_FORMATS:
+        raise ValueError(f"Unsupported batch format {fmt}; choose from {BATCH_FORMATS}")
+    workers = workers or os.cpu_count() or 1
+    ext = fmt.lower()
+    # PNG is already compressed; deflating it again only costs time
+    compression = zipfile.ZIP_STORED if fmt == "PNG" else zipfile.ZIP_DEFLATED
+    options = (fmt, fill_color, back_color, error_level, box_size, border)
+
+    done, start = 0, time.perf_counter()
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+         zipfile.ZipFile(out, "w", compression=compression) as archive:
+
+        def drain(limit):
+            nonlocal done
+            while len(pending) > limit:
+                for index, data in pending.popleft().result():
+                    archive.writestr(f"qr_{index:06d}.{ext}", data)
+                    done += 1
+                if progress: progress(done, time.perf_counter() - start)
+
+        for chunk in chunked(enumerate(payloads, 1), BATCH_CHUNK):
+            pending.append(pool.submit(render_batch, chunk, *options))
+            drain(workers * BATCH_IN_FLIGHT)
+        drain(0)
+    return done, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch-generate QR codes into a ZIP archive (no Streamlit needed).")
+    parser.add_argument("input", help="CSV or text file of payloads (text: one per line)")
+    parser.add_argument("-o", "--output", default="qr_codes.zip", help="ZIP file to write")
+    parser.add_argument("-c", "--column", help="CSV column name or 0-based index, below a header row (default: first column of .csv files)")
+    parser.add_argument("-f", "--format", default="PNG", choices=BATCH_FORMATS, type=str.upper)
+    parser.add_argument("--fill", default="#000000", help="foreground colour")
+    parser.add_argument("--back", default="#FFFFFF", help="background colour")
+    parser.add_argument("--ecc", default="M", choices="LMQH", type=str.upper, help="error correction level")
+    parser.add_argument("--box-size", type=int, default=10)
+    parser.add_argument("--border", type=int, default=4)
+    parser.add_argument("-w", "--workers", type=int, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    column = args.column
+    if column is None and args.input.lower().endswith(".csv"):
+        column = "0"
+    error_level = next(label for label in ECC_LEVELS if label.startswith(args.ecc))
+
+    def progress(done, seconds):
+        print(f"\r{done:,} codes  {done / seconds:,.0f} codes/sec", end="", flush=True)
+
+    with open(args.input, newline="", encoding="utf-8") as f:
+        codes, seconds = batch_generate(read_payloads(f, column), args.output, args.format, args.fill, args.back,
+                                        error_level, args.box_size, args.border, args.workers, progress)
+    print(f"\nWrote {codes:,} codes to {args.output} in {seconds:.2f}s ({codes / max(seconds, 1e-9):,.0f} codes/sec)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())